@@ -8,14 +8,21 @@ from homeassistant.const import (ATTR_SW_VERSION, CONF_DEVICE,
                                  CONF_FRIENDLY_NAME, CONF_MAC, CONF_PASSWORD,
                                  CONF_SCAN_INTERVAL, Platform)
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.dispatcher import dispatcher_send
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.storage import Store
 
 from .const import *
 from .kettle_connection import KettleConnection
+from .loop_monitor import LoopMonitor
+from .skykettle import SkyKettle
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 PLATFORMS = [
     Platform.WATER_HEATER,
     Platform.SWITCH,
@@ -25,43 +32,109 @@ PLATFORMS = [
 ]
 
 
+def get_platforms(model_code):
+    """Platforms which have entities for this kettle model, so others are not even imported."""
+    if model_code in [SkyKettle.MODELS_4]: # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
+        return PLATFORMS
+    return [Platform.WATER_HEATER, Platform.SWITCH, Platform.SENSOR]
+
+
+async def async_setup(hass: HomeAssistant, config):
+    """Set up the services, they are shared by all kettles."""
+    # Imported on use, like the platforms, to keep the integration import cheap
+    from .services import async_setup_services
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Sky Kettle integration from a config entry."""
     entry.async_on_unload(entry.add_update_listener(entry_update_listener))
 
     if DOMAIN not in hass.data: hass.data[DOMAIN] = {}
-    if entry.entry_id not in hass.data: hass.data[DOMAIN][entry.entry_id] = {}
+    if entry.entry_id not in hass.data[DOMAIN]: hass.data[DOMAIN][entry.entry_id] = {}
+    data = hass.data[DOMAIN][entry.entry_id]
 
+    # One loop monitor for all kettles, they share the event loop
+    monitor = hass.data[DOMAIN].setdefault(DATA_LOOP_MONITOR, LoopMonitor())
     kettle = KettleConnection(
         mac=entry.data[CONF_MAC],
         key=entry.data[CONF_PASSWORD],
         persistent=entry.data[CONF_PERSISTENT_CONNECTION],
+        keepalive=entry.data.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE),
+        span_file=get_span_file(hass, entry),
+        capture_file=get_capture_file(hass, entry),
         adapter=entry.data.get(CONF_DEVICE, None),
         hass=hass,
-        model=entry.data.get(CONF_FRIENDLY_NAME, None)
+        model=entry.data.get(CONF_FRIENDLY_NAME, None),
+        monitor=monitor
     )
     hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION] = kettle
+    monitor.set_enabled(kettle, entry.data.get(CONF_LOOP_MONITOR, DEFAULT_LOOP_MONITOR))
+    # Show last known state until the first update
+    store = get_store(hass, entry)
+    stored = await store.async_load()
+    if stored: kettle.restore_state(stored)
+    data[DATA_SCHEDULE_WRITES] = entry.data.get(CONF_SCHEDULE_WRITES, DEFAULT_SCHEDULE_WRITES)
+    # Named profiles for the apply_profile service
+    data[DATA_PROFILE_STORE] = get_profile_store(hass, entry)
+    data[DATA_PROFILES] = await data[DATA_PROFILE_STORE].async_load() or {}
+    # State pushed by the kettle itself
+    entry.async_on_unload(kettle.add_update_listener(monitor.wrap(
+        f"{entry.data[CONF_MAC]} pushed state dispatch", lambda: async_dispatcher_send(hass, DISPATCHER_UPDATE.format(entry.entry_id))
+    )))
+    # Connect as soon as the kettle is seen
+    from homeassistant.components import bluetooth
+    entry.async_on_unload(bluetooth.async_register_callback(
+        hass,
+        monitor.wrap(f"{entry.data[CONF_MAC]} advertisement_callback", lambda service_info, change: kettle.advertisement_callback()),
+        bluetooth.BluetoothCallbackMatcher(address=entry.data[CONF_MAC], connectable=True),
+        bluetooth.BluetoothScanningMode.ACTIVE
+    ))
 
     async def poll(now, **kwargs) -> None:
         await kettle.update()
-        await hass.async_add_executor_job(dispatcher_send, hass, DISPATCHER_UPDATE)
-        if hass.data[DOMAIN][DATA_WORKING]:
+        store.async_delay_save(kettle.export_state, STORAGE_SAVE_DELAY)
+        sw_version = kettle.state.sw_version
+        if sw_version and sw_version != entry.data.get(ATTR_SW_VERSION, None):
+            # Firmware version is learned, save it, device info will be updated by the listener
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, ATTR_SW_VERSION: sw_version}
+            )
+        await monitor.dispatch(hass, DISPATCHER_UPDATE.format(entry.entry_id), f"{entry.data[CONF_MAC]} poll")
+        if data[DATA_WORKING]:
             schedule_poll(timedelta(seconds=entry.data[CONF_SCAN_INTERVAL]))
         else:
             _LOGGER.info("Not working anymore, stop")
 
     def schedule_poll(td):
-        hass.data[DOMAIN][DATA_CANCEL] = ev.async_call_later(hass, td, poll)
+        data[DATA_CANCEL] = ev.async_call_later(hass, td, poll)
 
-    hass.data[DOMAIN][DATA_WORKING] = True
-    hass.data[DOMAIN][DATA_DEVICE_INFO] = lambda: device_info(entry)
+    data[DATA_WORKING] = True
+    hass.data[DOMAIN][entry.entry_id][DATA_DEVICE_INFO] = device_info(entry)
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    platforms = get_platforms(kettle.model_code)
+    hass.data[DOMAIN][entry.entry_id][DATA_PLATFORMS] = platforms
+    await hass.config_entries.async_forward_entry_setups(entry, platforms)
 
     schedule_poll(timedelta(seconds=3))
 
     return True
 
+def get_span_file(hass, entry):
+    if not entry.data.get(CONF_TRACE_SPANS, DEFAULT_TRACE_SPANS): return None
+    return hass.config.path(SPANS_FILE)
+
+def get_capture_file(hass, entry):
+    if not entry.data.get(CONF_CAPTURE_FRAMES, DEFAULT_CAPTURE_FRAMES): return None
+    return hass.config.path(CAPTURE_FILE.format(entry.data[CONF_MAC].replace(":", "").lower()))
+
+def get_store(hass, entry):
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+
+def get_profile_store(hass, entry):
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.profiles")
+
 def device_info(entry):
     return DeviceInfo(
         name=(FRIENDLY_NAME + " " + entry.data.get(CONF_FRIENDLY_NAME, "")).strip(),
@@ -79,19 +152,35 @@ def device_info(entry):
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
     _LOGGER.debug("Unloading")
-    hass.data[DOMAIN][DATA_WORKING] = False
-    for component in PLATFORMS:
-        hass.async_create_task(
-            hass.config_entries.async_forward_entry_unload(entry, component)
-        )
-    hass.data[DOMAIN][DATA_CANCEL]()
-    await hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION].stop()
-    hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION] = None
+    data = hass.data[DOMAIN][entry.entry_id]
+    data[DATA_WORKING] = False
+    data[DATA_CANCEL]()
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, data[DATA_PLATFORMS])
+    # Cancels update in progress, takes no more than a few seconds
+    await data[DATA_CONNECTION].stop()
+    hass.data[DOMAIN].pop(entry.entry_id)
     _LOGGER.debug("Entry unloaded")
-    return True
+    return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove stored state and profiles of the deleted entry."""
+    await get_store(hass, entry).async_remove()
+    await get_profile_store(hass, entry).async_remove()
 
 async def entry_update_listener(hass, entry):
     """Handle options update."""
     kettle = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION]
     kettle.persistent = entry.data.get(CONF_PERSISTENT_CONNECTION)
+    kettle.keepalive = entry.data.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE)
+    kettle.span_file = get_span_file(hass, entry)
+    kettle.capture_file = get_capture_file(hass, entry)
+    kettle.monitor.set_enabled(kettle, entry.data.get(CONF_LOOP_MONITOR, DEFAULT_LOOP_MONITOR))
+    hass.data[DOMAIN][entry.entry_id][DATA_SCHEDULE_WRITES] = entry.data.get(CONF_SCHEDULE_WRITES, DEFAULT_SCHEDULE_WRITES)
+    info = device_info(entry)
+    if info != hass.data[DOMAIN][entry.entry_id][DATA_DEVICE_INFO]:
+        hass.data[DOMAIN][entry.entry_id][DATA_DEVICE_INFO] = info
+        device_registry = dr.async_get(hass)
+        device = device_registry.async_get_device(identifiers=info["identifiers"])
+        if device:
+            device_registry.async_update_device(device.id, sw_version=info["sw_version"])
     _LOGGER.debug("Options updated")
@@ -0,0 +1,199 @@
+"""Capture of raw SkyKettle frames and their replay.
+
+Capture file is a header followed by records, every record is
+"<dBB" (seconds since capture start, record type, frame length) and the frame.
+When the file grows over the size limit, it's renamed to "<file>.1" (replacing
+the older one) and a new file is started, so the last frames are kept.
+"""
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
+from struct import Struct
+from time import monotonic
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"SKYCAP\x01\n"
+RECORD = Struct("<dBB")
+CAPTURE_MAX_BYTES = 4 * 1024 * 1024 # Per file, the rotated one is kept too
+
+RECORD_TX = 0
+RECORD_RX = 1
+RECORD_CONNECT = 2
+RECORD_DISCONNECT = 3
+
+
+class CaptureWriter():
+    """Collects records in memory, take() queues them and write() writes them to the file in the executor."""
+
+    def __init__(self, path, clock=monotonic, max_bytes=CAPTURE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes # None - no limit
+        self._clock = clock
+        self._start = clock()
+        self._buffer = bytearray()
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._size = None # File is truncated by the first write
+        self._rotated = False
+
+    def add(self, record_type, frame=b""):
+        self._buffer += RECORD.pack(self._clock() - self._start, record_type, len(frame))
+        self._buffer += frame
+
+    @property
+    def pending(self):
+        return len(self._buffer) > 0
+
+    def take(self):
+        """Queue collected data for write(), call from the event loop."""
+        self._queue.append(bytes(self._buffer))
+        self._buffer.clear()
+
+    def write(self):
+        """Blocking, run it in the executor, queued data is written in order."""
+        with self._lock:
+            while self._queue:
+                data = self._queue.popleft()
+                if self._size != None and self.max_bytes != None and self._size + len(data) > self.max_bytes:
+                    # Records are written whole, so both files stay readable
+                    os.replace(self.path, self.path + ".1")
+                    self._size = None
+                    self._rotated = True
+                elif self._size == None and not self._rotated and os.path.exists(self.path + ".1"):
+                    os.remove(self.path + ".1") # Left from the previous capture
+                with open(self.path, "wb" if self._size == None else "ab") as f:
+                    if self._size == None:
+                        f.write(CAPTURE_MAGIC)
+                        self._size = len(CAPTURE_MAGIC)
+                    f.write(data)
+                self._size += len(data)
+
+
+def read_capture(path):
+    """List of (time, record type, frame) tuples."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(CAPTURE_MAGIC):
+        raise ValueError("Not a SkyKettle capture file")
+    records = []
+    pos = len(CAPTURE_MAGIC)
+    while pos + RECORD.size <= len(data):
+        t, record_type, length = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        if pos + length > len(data): break # Truncated
+        records.append((t, record_type, bytes(data[pos:pos + length])))
+        pos += length
+    return records
+
+
+class ReplayClient():
+    """BleakClient stand-in which answers with the captured frames.
+
+    Every written frame takes the next captured TX frame with the same command
+    in this connection, RX frames which followed it are delivered with the
+    original delays or immediately.
+    Sequence numbers of responses are replaced with the current ones.
+    """
+
+    def __init__(self, session, disconnected_callback=None):
+        self.session = session
+        self.disconnected_callback = disconnected_callback
+        self.is_connected = True
+        self._notify_callback = None
+
+    async def start_notify(self, uuid, callback):
+        self._notify_callback = callback
+
+    async def write_gatt_char(self, uuid, data, response=None):
+        if not self.is_connected: raise IOError("Not connected")
+        responses = self.session.next_responses(bytes(data))
+        if responses == None:
+            # Link was lost here in the captured session
+            await self.disconnect()
+            raise IOError("Disconnected")
+        loop = asyncio.get_running_loop()
+        for delay, frame in responses:
+            if self.session.realtime:
+                loop.call_later(delay, self._deliver, frame)
+            else:
+                loop.call_soon(self._deliver, frame)
+
+    def _deliver(self, frame):
+        if self.is_connected and self._notify_callback:
+            self._notify_callback(self, bytearray(frame))
+
+    async def disconnect(self):
+        if not self.is_connected: return True
+        self.is_connected = False
+        if self.disconnected_callback:
+            asyncio.get_running_loop().call_soon(self.disconnected_callback, self)
+        return True
+
+
+class ReplaySession():
+    """Position in the captured records shared by all replay clients."""
+
+    def __init__(self, records, realtime=True):
+        self.records = records
+        self.realtime = realtime # Original timing or as fast as possible
+        self.position = 0
+        self._end = max((n + 1 for n, record in enumerate(records) if record[1] == RECORD_TX), default=0)
+        self.mismatches = 0
+        self.skipped = 0 # Captured commands skipped to resync
+
+    @property
+    def finished(self):
+        """No captured commands left."""
+        return self.position >= self._end
+
+    def connect(self):
+        """Skip to the next captured connection."""
+        while self.position < len(self.records):
+            _, record_type, _ = self.records[self.position]
+            self.position += 1
+            if record_type == RECORD_CONNECT: return
+
+    def next_responses(self, frame):
+        """(delay, frame) for every RX frame after the next TX frame, None if the link was lost there."""
+        while self.position < len(self.records) and self.records[self.position][1] != RECORD_TX:
+            if self.records[self.position][1] in [RECORD_CONNECT, RECORD_DISCONNECT]: return None
+            self.position += 1 # RX frames which weren't read in this replay
+        if self.position >= len(self.records): return []
+        tx_time, _, tx_frame = self.records[self.position]
+        if len(tx_frame) > 2 and len(frame) > 2 and tx_frame[2] != frame[2]:
+            resync = self._find_command(frame[2])
+            if resync != None:
+                # Commands of user actions which are not replayed
+                self.skipped += 1
+                self.position = resync
+                tx_time, _, tx_frame = self.records[self.position]
+            else:
+                self.mismatches += 1
+                _LOGGER.debug(f"Replay mismatch: captured command {tx_frame[2]:02x}, sent {frame[2]:02x}")
+        self.position += 1
+        responses = []
+        while self.position < len(self.records) and self.records[self.position][1] == RECORD_RX:
+            t, _, rx_frame = self.records[self.position]
+            self.position += 1
+            if len(rx_frame) > 1 and len(tx_frame) > 1 and len(frame) > 1 and rx_frame[1] == tx_frame[1]:
+                rx_frame = rx_frame[:1] + frame[1:2] + rx_frame[2:] # Response to this command
+            responses.append((max(0, t - tx_time), rx_frame))
+        return responses
+
+    def _find_command(self, command):
+        """Position of the next TX frame with this command in the current connection or None."""
+        for position in range(self.position, len(self.records)):
+            _, record_type, frame = self.records[position]
+            if record_type in [RECORD_CONNECT, RECORD_DISCONNECT]: return None
+            if record_type == RECORD_TX and len(frame) > 2 and frame[2] == command: return position
+        return None
+
+    def client_factory(self):
+        """KettleConnection client_factory which replays this session."""
+        async def connect(disconnected_callback):
+            self.connect()
+            return ReplayClient(self, disconnected_callback)
+        return connect
@@ -133,6 +133,11 @@ class SkyKettleConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             self.config[CONF_SCAN_INTERVAL] = user_input[CONF_SCAN_INTERVAL]
             self.config[CONF_PERSISTENT_CONNECTION] = user_input[CONF_PERSISTENT_CONNECTION]
+            self.config[CONF_KEEPALIVE] = user_input[CONF_KEEPALIVE]
+            self.config[CONF_TRACE_SPANS] = user_input[CONF_TRACE_SPANS]
+            self.config[CONF_LOOP_MONITOR] = user_input[CONF_LOOP_MONITOR]
+            self.config[CONF_CAPTURE_FRAMES] = user_input[CONF_CAPTURE_FRAMES]
+            self.config[CONF_SCHEDULE_WRITES] = user_input[CONF_SCHEDULE_WRITES]
             fname = f"{self.config.get(CONF_FRIENDLY_NAME, FRIENDLY_NAME)} ({self.config[CONF_MAC]})"
             # _LOGGER.debug(f"saving config: {self.config}")
             if self.entry:
@@ -146,6 +151,11 @@ class SkyKettleConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         {
             vol.Required(CONF_PERSISTENT_CONNECTION, default=self.config.get(CONF_PERSISTENT_CONNECTION, DEFAULT_PERSISTENT_CONNECTION)): cv.boolean,
             vol.Required(CONF_SCAN_INTERVAL, default=self.config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+            vol.Required(CONF_KEEPALIVE, default=self.config.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE)): cv.boolean,
+            vol.Required(CONF_TRACE_SPANS, default=self.config.get(CONF_TRACE_SPANS, DEFAULT_TRACE_SPANS)): cv.boolean,
+            vol.Required(CONF_LOOP_MONITOR, default=self.config.get(CONF_LOOP_MONITOR, DEFAULT_LOOP_MONITOR)): cv.boolean,
+            vol.Required(CONF_CAPTURE_FRAMES, default=self.config.get(CONF_CAPTURE_FRAMES, DEFAULT_CAPTURE_FRAMES)): cv.boolean,
+            vol.Required(CONF_SCHEDULE_WRITES, default=self.config.get(CONF_SCHEDULE_WRITES, DEFAULT_SCHEDULE_WRITES)): cv.boolean,
         })
 
         return self.async_show_form(
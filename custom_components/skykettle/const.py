@@ -6,16 +6,57 @@ MANUFACTORER = "Redmond"
 SUGGESTED_AREA = "kitchen"
 
 CONF_PERSISTENT_CONNECTION = "persistent_connection"
+CONF_KEEPALIVE = "keepalive"
+CONF_TRACE_SPANS = "trace_spans"
+CONF_LOOP_MONITOR = "loop_monitor"
+CONF_CAPTURE_FRAMES = "capture_frames"
+CONF_SCHEDULE_WRITES = "schedule_writes"
 
 DEFAULT_SCAN_INTERVAL = 5
 DEFAULT_PERSISTENT_CONNECTION = True
+DEFAULT_KEEPALIVE = False
+DEFAULT_TRACE_SPANS = False
+DEFAULT_LOOP_MONITOR = False
+DEFAULT_CAPTURE_FRAMES = False
+DEFAULT_SCHEDULE_WRITES = False
 
 DATA_CONNECTION = "connection"
 DATA_CANCEL = "cancel"
 DATA_WORKING = "working"
 DATA_DEVICE_INFO = "device_info"
+DATA_PLATFORMS = "platforms"
+DATA_PROFILES = "profiles"
+DATA_PROFILE_STORE = "profile_store"
+DATA_SCHEDULE_WRITES = "schedule_writes"
+DATA_LOOP_MONITOR = "loop_monitor"
 
-DISPATCHER_UPDATE = "update"
+DISPATCHER_UPDATE = "skykettle_update_{}"
+
+SERVICE_ADD_SCHEDULE = "add_schedule"
+SERVICE_DELETE_SCHEDULE = "delete_schedule"
+SERVICE_LIST_SCHEDULE = "list_schedule"
+SERVICE_APPLY_PROFILE = "apply_profile"
+SERVICE_SAVE_PROFILE = "save_profile"
+SERVICE_DELETE_PROFILE = "delete_profile"
+
+ATTR_BOIL_TIME = "boil_time"
+ATTR_RECORD_ID = "record_id"
+ATTR_PROFILE = "profile"
+ATTR_SOUND = "sound"
+ATTR_BOIL_LIGHT = "boil_light"
+ATTR_SYNC_LIGHT = "sync_light"
+ATTR_BOIL_COLORS = "boil_colors"
+ATTR_BOIL_BRIGHTNESS = "boil_brightness"
+ATTR_LAMP_COLORS = "lamp_colors"
+ATTR_LAMP_BRIGHTNESS = "lamp_brightness"
+ATTR_LAMP_INTERVAL = "lamp_interval"
+ATTR_LAMP_AUTO_OFF_HOURS = "lamp_auto_off_hours"
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 30
+
+SPANS_FILE = "skykettle_spans.jsonl"
+CAPTURE_FILE = "skykettle_{}.skycap"
 
 ROOM_TEMP = 25
 BOIL_TEMP = 100
@@ -0,0 +1,63 @@
+"""Diagnostics support for SkyKettle."""
+from datetime import datetime
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD
+
+from .const import *
+from .skykettle import SkyKettle
+
+TO_REDACT = {CONF_PASSWORD}
+
+
+def format_frame(is_tx, frame):
+    # Auth command contains the key
+    if is_tx and len(frame) > 2 and frame[2] == SkyKettle.COMMAND_AUTH:
+        return frame[:3].hex(" ") + " **REDACTED**"
+    return frame.hex(" ")
+
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    """Return diagnostics for a config entry, frames are formatted only here."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    kettle = data[DATA_CONNECTION]
+    state = kettle.state
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "device": {
+            "model": kettle.model,
+            "model_code": kettle.model_code,
+            "platforms": [str(platform) for platform in data.get(DATA_PLATFORMS, [])],
+        },
+        "connection": {
+            "available": state.available,
+            "stale": state.stale,
+            "connected": state.connected,
+            "auth_ok": state.auth_ok,
+            "persistent": kettle.persistent,
+            "keepalive": kettle.keepalive,
+            "sw_version": state.sw_version,
+            "polls_saved": state.polls_saved,
+        },
+        "statistics": {
+            "success_rates": dict(state.success_rates),
+            "error_counters": dict(state.error_counters),
+            "command_latency": dict(state.command_latency),
+            "command_latencies": dict(state.command_latencies),
+            "connect_time": dict(state.connect_time),
+            "auth_time": dict(state.auth_time),
+            "timeouts": state.timeouts,
+            "retries": state.retries,
+            "stream_fps": state.stream_fps,
+            "stream_dropped": state.stream_dropped,
+        },
+        "loop": kettle.monitor.report(),
+        "trace": [
+            {
+                "time": datetime.fromtimestamp(t).isoformat(timespec="milliseconds"),
+                "direction": "tx" if is_tx else "rx",
+                "frame": format_frame(is_tx, frame),
+            }
+            for t, is_tx, frame in kettle.trace
+        ],
+    }
@@ -0,0 +1,91 @@
+"""Light effects computed locally and streamed to the kettle in the light mode."""
+import asyncio
+import colorsys
+import logging
+import math
+from time import monotonic
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Effect functions: (seconds since start, (r, g, b), brightness) -> (r, g, b, brightness) or None when finished
+def fade(t, rgb, brightness):
+    r, g, b = rgb
+    return r, g, b, int(brightness * (0.5 - 0.5 * math.cos(2 * math.pi * t / 6)))
+
+def pulse(t, rgb, brightness):
+    r, g, b = rgb
+    return r, g, b, int(brightness * math.sin(math.pi * t / 1.2) ** 4)
+
+def rainbow(t, rgb, brightness):
+    r, g, b = colorsys.hsv_to_rgb((t / 10) % 1, 1, 1)
+    return int(r * 255), int(g * 255), int(b * 255), brightness
+
+def alert(t, rgb, brightness):
+    if t >= 3: return None
+    return 255, 0, 0, (255 if int(t * 8) % 2 == 0 else 0)
+
+EFFECTS = {
+    "fade": fade,
+    "pulse": pulse,
+    "rainbow": rainbow,
+    "alert": alert,
+}
+
+
+class EffectRunner():
+    """Runs one effect at a time for the kettle light.
+
+    A frame is computed for the current time only when the previous one is
+    sent, so a slow link drops frames and the effect keeps its speed. Frames
+    are paced a bit faster than the rate the stream achieves (stream_fps), so
+    the rate follows the link capacity, INITIAL_FPS is the guess until it's
+    measured.
+    """
+    INITIAL_FPS = 20
+    MAX_FPS = 50
+    PROBE = 1.25 # Faster than the measured rate to find out if the link can do more
+
+    def __init__(self, kettle, on_finish=None):
+        self.kettle = kettle
+        self.on_finish = on_finish # Called when a finite effect is over
+        self.effect = None
+        self.frames = 0
+        self.dropped = 0
+        self._task = None
+
+    def start(self, effect, rgb, brightness):
+        self.stop()
+        self.effect = effect
+        self._task = asyncio.get_running_loop().create_task(self._run(EFFECTS[effect], rgb, brightness))
+
+    def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self.effect = None
+
+    @property
+    def fps(self):
+        """Frame rate to compute frames at."""
+        stream_fps = self.kettle.state.stream_fps
+        if not stream_fps: return EffectRunner.INITIAL_FPS
+        return min(stream_fps * EffectRunner.PROBE, EffectRunner.MAX_FPS)
+
+    async def _run(self, effect, rgb, brightness):
+        start = monotonic()
+        while True:
+            frame = effect(monotonic() - start, rgb, brightness)
+            if frame == None: break
+            if self.kettle.streaming:
+                # Link is still busy with the previous frame
+                self.dropped += 1
+            else:
+                self.kettle.stream_color(*frame)
+                self.frames += 1
+            await asyncio.sleep(1 / self.fps)
+        # Back to the plain color
+        self.kettle.stream_color(*rgb, brightness)
+        self.effect = None
+        self._task = None
+        if self.on_finish: self.on_finish()
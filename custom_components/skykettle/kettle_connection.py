@@ -1,17 +1,26 @@
 import asyncio
 import logging
 import traceback
-from time import monotonic
+from collections import deque
+from datetime import timedelta
+from struct import error as StructError
+from time import monotonic, time
 
+from bleak import BleakScanner
 from bleak_retry_connector import establish_connection, BleakClientWithServiceCache
 
-from homeassistant.components import bluetooth
-
+from .capture import *
 from .const import *
-from .skykettle import SkyKettle
+from .kettle_state import KettleState
+from .loop_monitor import LoopMonitor
+from .skykettle import SkyKettle, SkyKettleError
+from .spans import SpanRecorder, append_lines
+from .stats import *
 
 _LOGGER = logging.getLogger(__name__)
 
+COMMAND_NAMES = {value: name[len("COMMAND_"):].lower() for name, value in vars(SkyKettle).items() if name.startswith("COMMAND_")}
+
 
 class KettleConnection(SkyKettle):
     UUID_SERVICE = "6e400001-b5a3-f393e-0a9e-50e24dcca9e"
@@ -22,16 +31,29 @@ class KettleConnection(SkyKettle):
     TRIES_INTERVAL = 0.5
     STATS_INTERVAL = 15
     TARGET_TTL = 30
-
-    def __init__(self, mac, key, persistent=True, adapter=None, hass=None, model=None):
+    RECONNECT_DELAYS = [0, 1, 2, 5, 10, 30]
+    KEEPALIVE_INTERVAL = 30
+    ADVERTISEMENT_CONNECT_INTERVAL = 10
+    RESTORED_STATS_TTL = 300
+    STOP_TIMEOUT = 2
+    TRACE_SIZE = 64
+    SCHEDULE_TTL = 300
+    STREAM_FPS_WINDOW = 3
+    STREAM_PUBLISH_INTERVAL = 1 # Seconds between state snapshots while streaming
+    PUSHED_STATUS_TTL = DEFAULT_SCAN_INTERVAL
+
+    def __init__(self, mac, key, persistent=True, adapter=None, hass=None, model=None, keepalive=False, span_file=None, client_factory=None,
+            capture_file=None, monitor=None):
         super().__init__(model)
         self._device = None
         self._client = None
         self._mac = mac
         self._key = key
         self.persistent = persistent
+        self.keepalive = keepalive
         self.adapter = adapter
         self.hass = hass
+        self.client_factory = client_factory # async (disconnected_callback) -> client, to use without real kettle
         self._auth_ok = False
         self._sw_version = None
         self._iter = 0
@@ -40,7 +62,14 @@ class KettleConnection(SkyKettle):
         self._last_get_stats = 0
         self._last_connect_ok = False
         self._last_auth_ok = False
-        self._successes = []
+        self._outcomes = OutcomeRing()
+        self._timings = TimingStats()
+        self._trace = deque(maxlen=KettleConnection.TRACE_SIZE) # (time, is_tx, frame)
+        self._spans = SpanRecorder()
+        self.monitor = monitor if monitor != None else LoopMonitor() # Shared by all kettles in Home Assistant
+        self.span_file = span_file
+        self._capture = None
+        self.capture_file = capture_file
         self._target_state = None
         self._target_boil_time = None
         self._status = None
@@ -49,12 +78,35 @@ class KettleConnection(SkyKettle):
         self._light_switch_boil = None
         self._light_switch_sync = None
         self._fresh_water = None
+        self._schedule = None # Cached schedule records
+        self._schedule_max = None
+        self._schedule_time = 0
+        self._stream_color = None # Latest color waiting for the streaming sender
+        self._stream_task = None
+        self._stream_frames = deque() # Times of sent frames within STREAM_FPS_WINDOW
+        self._stream_publish_time = 0
+        self._stream_dropped = 0
         self._colors = {}
         self._disposed = False
-        self._last_data = None
+        self._pending = None
+        self._pushed_status_time = None
+        self._queued_push = None # (time, frame) pushed while the connection was busy
+        self._status_poll_time = None
+        self._polls_saved = 0
+        self._update_listeners = []
+        self._update_tasks = set()
+        self._disconnecting = False
+        self._reconnect_task = None
+        self._keepalive_task = None
+        self._last_rx = 0
+        self._last_advertisement_connect = 0
+        self._stale = False
+        self._update_time = None
+        self._stats_time = None
         self._prev_energy_wh = None
         self._prev_energy_timestamp = None
         self._power_w = None
+        self._publish_state()
 
     async def command(self, command, params=[]):
         if self._disposed:
@@ -62,65 +114,278 @@ class KettleConnection(SkyKettle):
         if not self._client or not self._client.is_connected:
             raise IOError("not connected")
         self._iter = (self._iter + 1) % 256
-        _LOGGER.debug(f"Writing command {command:02x}, data: [{' '.join([f'{c:02x}' for c in params])}]")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f"Writing command {command:02x}, data: [{bytes(params).hex(' ')}]")
         data = bytes([0x55, self._iter, command] + list(params) + [0xAA])
-        # _LOGGER.debug(f"Writing {data}")
-        self._last_data = None
-        await self._client.write_gatt_char(KettleConnection.UUID_TX, data)
-        timeout_time = monotonic() + KettleConnection.BLE_RECV_TIMEOUT
-        while True:
-            await asyncio.sleep(0.05)
-            if self._last_data:
-                r = self._last_data
-                if r[0] != 0x55 or r[-1] != 0xAA:
-                    raise IOError("Invalid response magic")
-                if r[1] == self._iter:
-                    break
-                else:
-                    self._last_data = None
-            if monotonic() >= timeout_time: raise IOError("Receive timeout")
-        if r[2] != command:
-            raise IOError("Invalid response command")
+        self._trace.append((time(), True, data))
+        if self._capture:
+            # Never store the key
+            self._capture.add(RECORD_TX, data if command != SkyKettle.COMMAND_AUTH else data[:3] + bytes(len(params)) + data[-1:])
+        self._pending = self._iter, command, asyncio.get_running_loop().create_future()
+        start = monotonic()
+        try:
+            await self._client.write_gatt_char(KettleConnection.UUID_TX, data)
+            r = await asyncio.wait_for(self._pending[2], self.BLE_RECV_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._timings.add_timeout(command)
+            raise ReceiveTimeoutError("Receive timeout")
+        finally:
+            self._pending = None
+        self._timings.add_command(command, monotonic() - start)
         clean = bytes(r[3:-1])
-        _LOGGER.debug(f"Received: {' '.join([f'{c:02x}' for c in clean])}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f"Received: {clean.hex(' ')}")
         return clean
 
     def _rx_callback(self, sender, data):
-        # _LOGGER.debug(f"Received (full): {' '.join([f'{c:02x}' for c in data])}")
-        self._last_data = data
+        pending = self._pending
+        self._last_rx = monotonic()
+        data = bytes(data)
+        self._trace.append((time(), False, data))
+        if self._capture: self._capture.add(RECORD_RX, data)
+        if len(data) < 4 or data[0] != 0x55 or data[-1] != 0xAA:
+            if pending and not pending[2].done():
+                pending[2].set_exception(InvalidResponseError("Invalid response magic"))
+            return
+        # Pushed frames can have the same sequence number, so the command must match too
+        if pending and data[1] == pending[0] and data[2] == pending[1]:
+            if not pending[2].done():
+                pending[2].set_result(data)
+            return
+        self._unsolicited_callback(data)
+
+    def _unsolicited_callback(self, data):
+        """Handle a frame which is not a response to the pending command."""
+        if data[2] != SkyKettle.COMMAND_GET_STATUS:
+            _LOGGER.debug(f"Ignoring unsolicited frame, command {data[2]:02x}")
+            return
+        if self._update_lock.locked():
+            # Status may be being read right now, apply this one later if it's newer
+            self._queued_push = monotonic(), data
+            return
+        self._apply_pushed_status(data)
+
+    def _apply_queued_push(self):
+        """Apply status pushed while the connection was busy, unless it was polled after that."""
+        if self._queued_push == None or self._update_lock.locked(): return
+        push_time, data = self._queued_push
+        self._queued_push = None
+        if self._status_poll_time != None and self._status_poll_time > push_time: return
+        self._apply_pushed_status(data, push_time)
+
+    def _apply_pushed_status(self, data, push_time=None):
+        try:
+            status = self.decode_status(bytes(data[3:-1]))
+        except Exception as ex:
+            _LOGGER.debug(f"Can't decode pushed status ({type(ex).__name__}): {str(ex)}")
+            return
+        if not status: return
+        _LOGGER.debug("Status pushed by the kettle")
+        self._status = status
+        self._pushed_status_time = push_time if push_time != None else monotonic()
+        self._publish_state()
+        self._notify_update()
+
+    def add_update_listener(self, listener):
+        """Add a callback which is called when the state is changed outside of update(), returns remover."""
+        self._update_listeners.append(listener)
+        return lambda: self._update_listeners.remove(listener)
+
+    def _notify_update(self):
+        for listener in list(self._update_listeners):
+            try:
+                listener()
+            except Exception:
+                _LOGGER.error(traceback.format_exc())
 
     async def _connect(self):
         if self._disposed:
             raise DisposedError()
         if self._client and self._client.is_connected: return
-        self._device = bluetooth.async_ble_device_from_address(
-            self.hass, self._mac, connectable=True
-        )
+        self._client = await self._open_client()
+        await self._subscribe()
+
+    async def _open_client(self):
+        """New connected client, it's not used until assigned to self._client."""
+        if self.client_factory:
+            _LOGGER.debug("Connecting to the Kettle using client factory...")
+            return await self.client_factory(self._disconnected_callback)
+        self._device = await self._find_device()
         if not self._device:
-            raise IOError("Device not found")
+            raise DeviceNotFoundError("Device not found")
         _LOGGER.debug("Connecting to the Kettle...")
-        self._client = await establish_connection(
+        return await establish_connection(
             BleakClientWithServiceCache,
             self._device,
             self._device.name or "Unknown Device",
             max_attempts=3,
-            ble_device_callback=lambda: bluetooth.async_ble_device_from_address(
-                self.hass, self._mac, connectable=True
-            ),
+            disconnected_callback=self._disconnected_callback,
+            ble_device_callback=self._last_device,
         )
+
+    async def _subscribe(self):
         _LOGGER.debug("Connected to the Kettle")
-        await self._client.start_notify(KettleConnection.UUID_RX, self._rx_callback)
+        await self._client.start_notify(KettleConnection.UUID_RX, self.monitor.wrap(f"{self._mac} rx_callback", self._rx_callback))
         _LOGGER.debug("Subscribed to RX")
+        if self._capture: self._capture.add(RECORD_CONNECT)
+
+    async def _find_device(self):
+        """BLEDevice of the kettle, from Home Assistant bluetooth or from own scan without hass."""
+        if self.hass:
+            # Imported only with Home Assistant, see tools/poller.py for the standalone use
+            from homeassistant.components import bluetooth
+            return bluetooth.async_ble_device_from_address(self.hass, self._mac, connectable=True)
+        _LOGGER.debug("Scanning for the Kettle...")
+        kwargs = {"adapter": self.adapter} if self.adapter else {}
+        return await BleakScanner.find_device_by_address(self._mac, timeout=BLE_SCAN_TIME, **kwargs)
+
+    def _last_device(self):
+        if self.hass:
+            from homeassistant.components import bluetooth
+            return bluetooth.async_ble_device_from_address(self.hass, self._mac, connectable=True) or self._device
+        return self._device
 
     auth = lambda self: super().auth(self._key)
 
+    def _disconnected_callback(self, client):
+        # Ignore our own disconnects and callbacks from old clients
+        if self._disposed or self._disconnecting or client is not self._client: return
+        _LOGGER.debug("Connection lost (disconnected by the kettle)")
+        if self._capture: self._capture.add(RECORD_DISCONNECT)
+        self._auth_ok = False
+        self._publish_state()
+        self._notify_update()
+        if self.persistent:
+            self._start_reconnect()
+
+    def _start_reconnect(self):
+        if self._reconnect_task and not self._reconnect_task.done(): return
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        """Restore persistent connection in background, so next command doesn't need to connect."""
+        for delay in self.RECONNECT_DELAYS:
+            await asyncio.sleep(delay)
+            if self._disposed or not self.persistent: return
+            if self.connected and self._auth_ok: return
+            # Connecting takes long with retries, commands can run meanwhile
+            try:
+                start = monotonic()
+                client = await self._open_client()
+                connect_time = monotonic() - start
+            except Exception as ex:
+                _LOGGER.debug(f"Can't reconnect ({type(ex).__name__}): {str(ex)}")
+                continue
+            async with self._update_lock:
+                if self._disposed or not self.persistent:
+                    await self._close_client(client)
+                    return
+                try:
+                    if self.connected:
+                        # A command has connected by itself meanwhile
+                        await self._close_client(client)
+                    else:
+                        await self.disconnect()
+                        self._client = client
+                        await self._subscribe()
+                        self._timings.add_connect(connect_time)
+                        self._last_connect_ok = True
+                    await self._connect_if_need()
+                    # Entities show the fresh state without waiting for the next poll
+                    await self._poll_status()
+                except Exception as ex:
+                    _LOGGER.debug(f"Can't reconnect ({type(ex).__name__}): {str(ex)}")
+                    await self.disconnect()
+                    continue
+                finally:
+                    self._flush_capture()
+            _LOGGER.debug("Reconnected")
+            self._publish_state()
+            self._notify_update()
+            return
+        # Give up, next poll will try again
+        _LOGGER.debug("Background reconnect failed")
+
+    async def _close_client(self, client):
+        try:
+            await client.disconnect()
+        except Exception:
+            pass
+
+    def advertisement_callback(self):
+        """Connect as soon as the kettle is seen, so the first command finds a ready link."""
+        if self._disposed or self._update_lock.locked(): return
+        if self.connected and self._auth_ok: return
+        # Regular polls are enough for non-persistent connection while the kettle is available
+        if not self.persistent and self.available: return
+        if self._reconnect_task and not self._reconnect_task.done(): return
+        if self._last_advertisement_connect + KettleConnection.ADVERTISEMENT_CONNECT_INTERVAL > monotonic(): return
+        self._last_advertisement_connect = monotonic()
+        _LOGGER.debug("Kettle is in range, connecting")
+        # stop() cancels it like updates
+        task = asyncio.get_running_loop().create_task(self._advertisement_connect())
+        self._update_tasks.add(task)
+        task.add_done_callback(self._update_tasks.discard)
+
+    async def _advertisement_connect(self):
+        """Connect and authenticate ahead of time, the scheduled update polls the state.
+
+        Non-persistent connection disconnects right away like after update().
+        """
+        async with self._update_lock:
+            if self._disposed: return
+            self._spans.start_cycle()
+            was_available = self.available
+            last_ok = self._last_connect_ok, self._last_auth_ok
+            try:
+                await self._connect_if_need()
+            except Exception as ex:
+                # The scheduled update retries and reports it, keep the current state
+                _LOGGER.debug(f"Can't connect on advertisement ({type(ex).__name__}): {str(ex)}")
+                self._last_connect_ok, self._last_auth_ok = last_ok
+                await self.disconnect()
+                return
+            else:
+                # Non-persistent connection only learns the kettle is available, it doesn't keep the link
+                await self._disconnect_if_need()
+            finally:
+                self._flush_spans()
+                self._flush_capture()
+        if self.available != was_available:
+            self._publish_state()
+            self._notify_update()
+
+    def _start_keepalive(self):
+        if not self.keepalive or not self.persistent: return
+        if self._keepalive_task and not self._keepalive_task.done(): return
+        self._keepalive_task = asyncio.get_running_loop().create_task(self._keepalive())
+
+    async def _keepalive(self):
+        """Detect half-dead persistent connection using a lightweight read when the link is idle."""
+        while not self._disposed and self.keepalive and self.persistent:
+            await asyncio.sleep(KettleConnection.KEEPALIVE_INTERVAL)
+            if not self.connected or not self._auth_ok or self._update_lock.locked(): continue
+            if self._last_rx + KettleConnection.KEEPALIVE_INTERVAL > monotonic(): continue
+            async with self._update_lock:
+                try:
+                    await self.get_version()
+                except Exception as ex:
+                    if self._disposed: return
+                    _LOGGER.debug(f"Keepalive failed ({type(ex).__name__}): {str(ex)}")
+                    await self.disconnect()
+                    self._start_reconnect()
+
     async def _disconnect(self):
+        self._disconnecting = True
         try:
             if self._client:
                 was_connected = self._client.is_connected
                 await self._client.disconnect()
-                if was_connected: _LOGGER.debug("Disconnected")
+                if was_connected:
+                    _LOGGER.debug("Disconnected")
+                    if self._capture: self._capture.add(RECORD_DISCONNECT)
         finally:
+            self._disconnecting = False
             self._auth_ok = False
             self._device = None
             self._client = None
@@ -136,150 +401,379 @@ class KettleConnection(SkyKettle):
             _LOGGER.debug("Connection lost")
             await self.disconnect()
         if not self._client or not self._client.is_connected:
-            try:
-                await self._connect()
-                self._last_connect_ok = True
-            except Exception as ex:
-                await self.disconnect()
-                self._last_connect_ok = False
-                raise ex
+            with self._spans.span("connect"):
+                try:
+                    start = monotonic()
+                    await self._connect()
+                    self._timings.add_connect(monotonic() - start)
+                    self._last_connect_ok = True
+                except Exception as ex:
+                    await self.disconnect()
+                    self._last_connect_ok = False
+                    raise ex
         if not self._auth_ok:
-            self._last_auth_ok = self._auth_ok = await self.auth()
-            if not self._auth_ok:
-                _LOGGER.error(f"Auth failed. You need to enable pairing mode on the kettle.")
-                raise AuthError("Auth failed")
+            with self._spans.span("auth"):
+                start = monotonic()
+                self._last_auth_ok = self._auth_ok = await self.auth()
+                self._timings.add_auth(monotonic() - start)
+                if not self._auth_ok:
+                    _LOGGER.error(f"Auth failed. You need to enable pairing mode on the kettle.")
+                    raise AuthError("Auth failed")
             _LOGGER.debug("Auth ok")
-            self._sw_version = await self.get_version()
-            await self.sync_time()
+            with self._spans.span("handshake"):
+                self._sw_version = await self.get_version()
+                await self.sync_time()
+            self._start_keepalive()
 
     async def _disconnect_if_need(self):
         if not self.persistent and self.target_mode != SkyKettle.MODE_GAME:
             await self.disconnect()
 
-    async def update(self, tries=MAX_TRIES, force_stats=False, extra_action=None, commit=False):
+    async def update(self, tries=None, force_stats=False, extra_action=None, commit=False):
+        if tries == None: tries = self.MAX_TRIES # Can be overridden per instance
+        # Run in a separate task, so stop() can cancel it
+        task = asyncio.get_running_loop().create_task(self._update(tries, force_stats, extra_action, commit))
+        self._update_tasks.add(task)
+        task.add_done_callback(self._update_tasks.discard)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # Cancelled by stop(), not the caller itself
+            if self._disposed and not asyncio.current_task().cancelling(): return False
+            raise
+
+    async def _update(self, tries, force_stats, extra_action, commit):
+        self._spans.start_cycle()
+        update_start = monotonic()
         try:
             async with self._update_lock:
+                self._spans.add("lock", update_start)
                 if self._disposed: return
                 _LOGGER.debug(f"Updating")
-                if not self.available: force_stats = True # Update stats after unavailable state
+                if not self.available and not self._stale: force_stats = True # Update stats after unavailable state
                 await self._connect_if_need()
 
-                if extra_action: await extra_action
+                if extra_action:
+                    with self._spans.span("extra_action"): await extra_action
 
+                if (extra_action == None and self._target_state == None and self._target_boil_time == None
+                        and self._pushed_status_fresh):
+                    # Plain refresh and the kettle already pushed its status since the last update, no need to poll it
+                    self._polls_saved += 1
+                else:
+                    # Targets are reconciled with a fresh status only
+                    with self._spans.span("status"):
+                        await self._poll_status()
+                self._pushed_status_time = None
                 # Is there scheduled boil_time?
-                self._status = await self.get_status()
                 boil_time = self._status.boil_time
                 if self._target_boil_time != None and self._target_boil_time != boil_time:
-                    try:
-                        _LOGGER.debug(f"Need to update boil time from {boil_time} to {self._target_boil_time}")
-                        boil_time = self._target_boil_time
-                        if self._target_state == None: # To return previous state
-                            self._target_state = self._status.mode if self._status.is_on else None, self._status.target_temp
-                            self._last_set_target = monotonic()
-                        if self._status.is_on:
-                            await self.turn_off()
-                            await asyncio.sleep(0.2)
-                        await self.set_main_mode(self._status.mode, self._status.target_temp, boil_time)
-                        _LOGGER.info(f"Boil time is succesfully set to {boil_time}")
-                    except Exception as ex:
-                        _LOGGER.error(f"Can't update boil time ({type(ex).__name__}): {str(ex)}")
-                    self._status = await self.get_status()
+                    with self._spans.span("boil_time"):
+                        try:
+                            _LOGGER.debug(f"Need to update boil time from {boil_time} to {self._target_boil_time}")
+                            boil_time = self._target_boil_time
+                            if self._target_state == None: # To return previous state
+                                self._target_state = self._status.mode if self._status.is_on else None, self._status.target_temp
+                                self._last_set_target = monotonic()
+                            if self._status.is_on:
+                                await self.turn_off()
+                                await asyncio.sleep(0.2)
+                            await self.set_main_mode(self._status.mode, self._status.target_temp, boil_time)
+                            _LOGGER.info(f"Boil time is succesfully set to {boil_time}")
+                        except Exception as ex:
+                            _LOGGER.error(f"Can't update boil time ({type(ex).__name__}): {str(ex)}")
+                        await self._poll_status()
                 self._target_boil_time = None
 
-                if commit: await self.commit()
+                if commit:
+                    with self._spans.span("commit"): await self.commit()
 
                 # If there is scheduled state
                 if self._target_state != None:
-                    target_mode, target_temp = self._target_state
-                    # How to set mode?
-                    if target_mode == None and self._status.is_on:
-                        _LOGGER.info(f"State: {self._status} -> {self._target_state}")
-                        _LOGGER.info("Need to turn off the kettle...")
-                        await self.turn_off()
-                        _LOGGER.info("The kettle was turned off")
-                        await asyncio.sleep(0.2)
-                        self._status = await self.get_status()
-                    elif target_mode != None and not self._status.is_on:
-                        _LOGGER.info(f"State: {self._status} -> {self._target_state}")
-                        _LOGGER.info("Need to set mode and turn on the kettle...")
-                        await self.set_main_mode(target_mode, target_temp, boil_time)
-                        _LOGGER.info("New mode was set")
-                        await self.turn_on()
-                        _LOGGER.info("The kettle was turned on")
-                        await asyncio.sleep(0.2)
-                        self._status = await self.get_status()
-                    elif target_mode != None  and (
-                            target_mode != self._status.mode or
-                            (target_mode in [SkyKettle.MODE_HEAT, SkyKettle.MODE_BOIL_HEAT] and
-                            target_temp != self._status.target_temp)):
-                        _LOGGER.info(f"State: {self._status} -> {self._target_state}")
-                        _LOGGER.info("Need to switch mode of the kettle and restart it")
-                        await self.turn_off()
-                        _LOGGER.info("The kettle was turned off")
-                        await asyncio.sleep(0.2)
-                        await self.set_main_mode(target_mode, target_temp, boil_time)
-                        _LOGGER.info("New mode was set")
-                        await self.turn_on()
-                        _LOGGER.info("The kettle was turned on")
-                        await asyncio.sleep(0.2)
-                        self._status = await self.get_status()
-                    else:
-                        _LOGGER.debug(f"There is no reason to update state")
-                    # Not scheduled anymore
-                    self._target_state = None
+                    with self._spans.span("target"):
+                        target_mode, target_temp = self._target_state
+                        # How to set mode?
+                        if target_mode == None and self._status.is_on:
+                            _LOGGER.info(f"State: {self._status} -> {self._target_state}")
+                            _LOGGER.info("Need to turn off the kettle...")
+                            await self.turn_off()
+                            _LOGGER.info("The kettle was turned off")
+                            await asyncio.sleep(0.2)
+                            await self._poll_status()
+                        elif target_mode != None and not self._status.is_on:
+                            _LOGGER.info(f"State: {self._status} -> {self._target_state}")
+                            _LOGGER.info("Need to set mode and turn on the kettle...")
+                            await self.set_main_mode(target_mode, target_temp, boil_time)
+                            _LOGGER.info("New mode was set")
+                            await self.turn_on()
+                            _LOGGER.info("The kettle was turned on")
+                            await asyncio.sleep(0.2)
+                            await self._poll_status()
+                        elif target_mode != None  and (
+                                target_mode != self._status.mode or
+                                (target_mode in [SkyKettle.MODE_HEAT, SkyKettle.MODE_BOIL_HEAT] and
+                                target_temp != self._status.target_temp)):
+                            _LOGGER.info(f"State: {self._status} -> {self._target_state}")
+                            _LOGGER.info("Need to switch mode of the kettle and restart it")
+                            await self.turn_off()
+                            _LOGGER.info("The kettle was turned off")
+                            await asyncio.sleep(0.2)
+                            await self.set_main_mode(target_mode, target_temp, boil_time)
+                            _LOGGER.info("New mode was set")
+                            await self.turn_on()
+                            _LOGGER.info("The kettle was turned on")
+                            await asyncio.sleep(0.2)
+                            await self._poll_status()
+                        else:
+                            _LOGGER.debug(f"There is no reason to update state")
+                        # Not scheduled anymore
+                        self._target_state = None
 
                 if self._last_get_stats + KettleConnection.STATS_INTERVAL < monotonic() or force_stats:
-                    self._last_get_stats = monotonic()
-                    self._stats = await self.get_stats()
-                    # Compute power from energy delta
-                    now = monotonic()
-                    if self._stats and self._stats.energy_wh is not None:
-                        energy_wh = self._stats.energy_wh
-                        if self._prev_energy_wh is not None and self._prev_energy_timestamp is not None:
-                            if energy_wh >= self._prev_energy_wh:
-                                elapsed_hours = (now - self._prev_energy_timestamp) / 3600.0
-                                if elapsed_hours > 0:
-                                    self._power_w = (energy_wh - self._prev_energy_wh) / elapsed_hours
+                    with self._spans.span("stats"):
+                        self._last_get_stats = monotonic()
+                        self._stats_time = time()
+                        self._stats = await self.get_stats()
+                        # Compute power from energy delta
+                        now = monotonic()
+                        if self._stats and self._stats.energy_wh is not None:
+                            energy_wh = self._stats.energy_wh
+                            if self._prev_energy_wh is not None and self._prev_energy_timestamp is not None:
+                                if energy_wh >= self._prev_energy_wh:
+                                    elapsed_hours = (now - self._prev_energy_timestamp) / 3600.0
+                                    if elapsed_hours > 0:
+                                        self._power_w = (energy_wh - self._prev_energy_wh) / elapsed_hours
+                                    else:
+                                        self._power_w = 0.0
                                 else:
-                                    self._power_w = 0.0
+                                    self._power_w = None
                             else:
                                 self._power_w = None
+                            self._prev_energy_wh = energy_wh
+                            self._prev_energy_timestamp = now
                         else:
                             self._power_w = None
-                        self._prev_energy_wh = energy_wh
-                        self._prev_energy_timestamp = now
-                    else:
-                        self._power_w = None
-                    self._light_switch_boil = await self.get_light_switch(SkyKettle.LIGHT_BOIL)
-                    self._light_switch_sync = await self.get_light_switch(SkyKettle.LIGHT_SYNC)
-                    self._lamp_auto_off_hours = await self.get_lamp_auto_off_hours()
-                    self._fresh_water = await self.get_fresh_water()
-                    for lt in [SkyKettle.LIGHT_BOIL, SkyKettle.LIGHT_LAMP]:
-                        self._colors[lt] = await self.get_colors(lt)
-
-                await self._disconnect_if_need()
+                        self._light_switch_boil = await self.get_light_switch(SkyKettle.LIGHT_BOIL)
+                        self._light_switch_sync = await self.get_light_switch(SkyKettle.LIGHT_SYNC)
+                        self._lamp_auto_off_hours = await self.get_lamp_auto_off_hours()
+                        self._fresh_water = await self.get_fresh_water()
+                        for lt in [SkyKettle.LIGHT_BOIL, SkyKettle.LIGHT_LAMP]:
+                            self._colors[lt] = await self.get_colors(lt)
+
+                with self._spans.span("disconnect"):
+                    await self._disconnect_if_need()
                 self.add_stat(True)
+                self._update_time = time()
+                self._stale = False
+                self._spans.add("update", update_start)
                 return True
 
         except Exception as ex:
             await self.disconnect()
-            if self._target_state != None and self._last_set_target + KettleConnection.TARGET_TTL < monotonic():
-                _LOGGER.warning(f"Can't set mode to {self._target_state} for {KettleConnection.TARGET_TTL} seconds, stop trying")
+            self._spans.add("update", update_start, ex)
+            if self._target_state != None and self._last_set_target + self.TARGET_TTL < monotonic():
+                _LOGGER.warning(f"Can't set mode to {self._target_state} for {self.TARGET_TTL} seconds, stop trying")
                 self._target_state = None
-            if type(ex) == AuthError: return
-            self.add_stat(False)
+            self.add_stat(False, ex)
+            if type(ex) == AuthError:
+                self._stale = False
+                return
             if tries > 1 and extra_action == None:
-                _LOGGER.debug(f"{type(ex).__name__}: {str(ex)}, retry #{KettleConnection.MAX_TRIES - tries + 1}")
-                await asyncio.sleep(KettleConnection.TRIES_INTERVAL)
-                return await self.update(tries=tries-1, force_stats=force_stats, extra_action=extra_action, commit=commit)
+                _LOGGER.debug(f"{type(ex).__name__}: {str(ex)}, retry #{self.MAX_TRIES - tries + 1}")
+                self._timings.retries += 1
+                await asyncio.sleep(self.TRIES_INTERVAL)
+                return await self._update(tries-1, force_stats, extra_action, commit)
             else:
                 _LOGGER.warning(f"Can't update status, {type(ex).__name__}: {str(ex)}")
                 _LOGGER.debug(traceback.format_exc())
+                self._stale = False
             return False
+        finally:
+            self._apply_queued_push()
+            self._publish_state()
+            self._flush_spans()
+            self._flush_capture()
+
+    async def _poll_status(self):
+        self._status = await self.get_status()
+        self._status_poll_time = monotonic()
+
+    @property
+    def _pushed_status_fresh(self):
+        """Status pushed after the last poll and recently enough to skip polling."""
+        if self._pushed_status_time == None: return False
+        if self._status_poll_time != None and self._status_poll_time > self._pushed_status_time: return False
+        return self._pushed_status_time + self.PUSHED_STATUS_TTL > monotonic()
 
-    def add_stat(self, value):
-        self._successes.append(value)
-        if len(self._successes) > 100: self._successes = self._successes[-100:]
+    @property
+    def mac(self):
+        return self._mac
+
+    @property
+    def timings(self):
+        """Timing statistics since start, copy() and since() give the exact timings of one poll."""
+        return self._timings
+
+    @property
+    def span_file(self):
+        """JSON lines file for update phase timings, None - disabled."""
+        return self._span_file
+
+    @span_file.setter
+    def span_file(self, value):
+        self._span_file = value
+        self._spans.enabled = value != None
+
+    @property
+    def capture_file(self):
+        """File to capture all frames for replay, None - disabled."""
+        return self._capture.path if self._capture else None
+
+    @capture_file.setter
+    def capture_file(self, value):
+        if value == self.capture_file: return
+        self._flush_capture()
+        self._capture = CaptureWriter(value) if value else None
+
+    def _run_in_executor(self, func, *args):
+        if self.hass:
+            return self.hass.async_add_executor_job(func, *args)
+        return asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _flush_spans(self):
+        lines = self._spans.pop_lines(mac=self._mac, model=self.model)
+        if not lines or not self._span_file: return
+        self._run_in_executor(append_lines, self._span_file, lines)
+
+    def _flush_capture(self):
+        if not self._capture or not self._capture.pending: return None
+        self._capture.take()
+        return self._run_in_executor(self._capture.write)
+
+    def _publish_state(self):
+        """Build a new state snapshot for the entities."""
+        colors = {}
+        brightness = {}
+        temperatures = {}
+        for light_type, colors_set in self._colors.items():
+            if not colors_set: continue
+            colors[light_type] = tuple(self.get_color(light_type, n) for n in range(3))
+            brightness[light_type] = colors_set.brightness
+            temperatures[light_type] = tuple(self.get_temperature(light_type, n) for n in range(3))
+        ontime = self.ontime
+        energy_wh = self.energy_wh
+        self._state = KettleState(
+            available=self.available or self._stale,
+            stale=self._stale,
+            connected=self.connected,
+            auth_ok=self.auth_ok,
+            persistent=self.persistent,
+            sw_version=f"{self._sw_version[0]}.{self._sw_version[1]}" if self._sw_version else None,
+            success_rate=self.success_rate,
+            success_rates=self._outcomes.success_rates(),
+            error_counters=self._outcomes.counters(),
+            polls_saved=self.polls_saved,
+            command_latency=self._timings.command.summary(),
+            command_latencies=self._timings.command_summaries(COMMAND_NAMES),
+            connect_time=self._timings.connect.summary(),
+            auth_time=self._timings.auth.summary(),
+            timeouts=sum(self._timings.timeouts.values()),
+            retries=self._timings.retries,
+            stream_fps=self.stream_fps,
+            stream_dropped=self.stream_dropped,
+            current_temp=self.current_temp,
+            current_mode=self.current_mode,
+            target_temp=self.target_temp,
+            target_mode=self.target_mode,
+            target_mode_str=self.target_mode_str,
+            sound_enabled=self.sound_enabled,
+            color_interval=self.color_interval,
+            boil_time=self.boil_time,
+            parental_control=self.parental_control,
+            error_code=self.error_code,
+            lamp_auto_off_hours=self.lamp_auto_off_hours,
+            light_switch_boil=self.light_switch_boil,
+            light_switch_sync=self.light_switch_sync,
+            water_freshness_hours=self.water_freshness_hours,
+            ontime=ontime,
+            ontime_seconds=ontime.total_seconds() if ontime else None,
+            energy_wh=energy_wh,
+            energy_kwh=round(energy_wh / 1000.0, 2) if energy_wh is not None else None,
+            power_w=self.power_w,
+            heater_on_count=self.heater_on_count,
+            user_on_count=self.user_on_count,
+            colors=colors,
+            brightness=brightness,
+            temperatures=temperatures
+        )
+
+    @property
+    def state(self):
+        """Last published state snapshot."""
+        return self._state
+
+    @property
+    def trace(self):
+        """Last raw frames as (time, is_tx, frame) tuples, oldest first."""
+        return list(self._trace)
+
+    def export_state(self):
+        """Last known state to keep it between restarts."""
+        return {
+            "update_time": self._update_time,
+            "stats_time": self._stats_time,
+            "sw_version": list(self._sw_version) if self._sw_version else None,
+            "status": list(self._status) if self._status else None,
+            "stats": list(self._stats._replace(ontime=self._stats.ontime.total_seconds())) if self._stats else None,
+            "colors": {str(light_type): list(colors) for light_type, colors in self._colors.items() if colors},
+            "light_switch_boil": self._light_switch_boil,
+            "light_switch_sync": self._light_switch_sync,
+            "lamp_auto_off_hours": self._lamp_auto_off_hours,
+            "fresh_water": list(self._fresh_water) if self._fresh_water else None,
+        }
+
+    def restore_state(self, data):
+        """Restore last known state, it's marked as stale until the first update."""
+        try:
+            self._update_time = data.get("update_time", None)
+            self._stats_time = data.get("stats_time", None)
+            if data.get("sw_version", None):
+                self._sw_version = tuple(data["sw_version"])
+            if data.get("status", None):
+                self._status = SkyKettle.Status(*data["status"])
+            if data.get("stats", None):
+                self._stats = SkyKettle.Stats(*data["stats"])
+                self._stats = self._stats._replace(ontime=timedelta(seconds=self._stats.ontime))
+            for light_type, colors in data.get("colors", {}).items():
+                self._colors[int(light_type)] = SkyKettle.ColorsSet(*colors)
+            self._light_switch_boil = data.get("light_switch_boil", None)
+            self._light_switch_sync = data.get("light_switch_sync", None)
+            self._lamp_auto_off_hours = data.get("lamp_auto_off_hours", None)
+            if data.get("fresh_water", None):
+                self._fresh_water = SkyKettle.FreshWaterInfo(*data["fresh_water"])
+        except Exception as ex:
+            _LOGGER.warning(f"Can't restore last known state ({type(ex).__name__}): {str(ex)}")
+            return
+        self._stale = True
+        # Don't read stats on the first update if stored ones are still fresh
+        if self._stats_time != None and self._stats_time + KettleConnection.RESTORED_STATS_TTL > time():
+            self._last_get_stats = monotonic()
+        _LOGGER.debug("Last known state restored")
+        self._publish_state()
+
+    def add_stat(self, value, ex=None):
+        if value:
+            self._outcomes.add(OUTCOME_SUCCESS)
+        elif isinstance(ex, (ReceiveTimeoutError, asyncio.TimeoutError)):
+            self._outcomes.add(OUTCOME_TIMEOUT)
+        elif isinstance(ex, AuthError):
+            self._outcomes.add(OUTCOME_AUTH)
+        elif isinstance(ex, DeviceNotFoundError):
+            self._outcomes.add(OUTCOME_NOT_FOUND)
+        elif isinstance(ex, (InvalidResponseError, StructError)):
+            self._outcomes.add(OUTCOME_DECODE)
+        else:
+            self._outcomes.add(OUTCOME_OTHER)
 
     @staticmethod
     def limit_temp(temp):
@@ -295,10 +789,15 @@ class KettleConnection(SkyKettle):
         if mode_id == None: return "off"
         return SkyKettle.MODE_NAMES[mode_id]
 
+    @property
+    def polls_saved(self):
+        return self._polls_saved
+
     @property
     def success_rate(self):
-        if len(self._successes) == 0: return 0
-        return int(100 * len([s for s in self._successes if s]) / len(self._successes))
+        """Success rate for the last hour."""
+        rate = self._outcomes.success_rate("1h")
+        return rate if rate != None else 0
 
     async def _set_target_state(self, target_mode, target_temp = 0):
         self._target_state = target_mode, target_temp
@@ -312,7 +811,20 @@ class KettleConnection(SkyKettle):
         if self._disposed: return
         self._disposed = True
         self._target_state = None
-        await self.disconnect()
+        self.monitor.set_enabled(self, False)
+        # Cancel everything in progress, don't wait for BLE timeouts
+        tasks = [task for task in [self._reconnect_task, self._keepalive_task, self._stream_task, *self._update_tasks] if task and not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=KettleConnection.STOP_TIMEOUT)
+        try:
+            await asyncio.wait_for(self._disconnect(), KettleConnection.STOP_TIMEOUT)
+        except Exception as ex:
+            _LOGGER.debug(f"Can't disconnect ({type(ex).__name__}): {str(ex)}")
+        self._publish_state()
+        flush = self._flush_capture()
+        if flush: await flush
         _LOGGER.info("Stopped.")
 
     @property
@@ -369,6 +881,10 @@ class KettleConnection(SkyKettle):
         """Set new temperature."""
         if target_temp == self.target_temp: return # already set
         _LOGGER.info(f"Setting target temperature to {target_temp}")
+        await self._set_target_state(*self._target_for_temp(target_temp, operation_mode))
+
+    def _target_for_temp(self, target_temp, operation_mode = None):
+        """Target mode and temperature to get this temperature."""
         target_mode = self.target_mode
         vs = [k for k, v in SkyKettle.MODE_NAMES.items() if v == operation_mode]
         if len(vs) > 0: target_mode = vs[0]
@@ -387,12 +903,16 @@ class KettleConnection(SkyKettle):
             target_mode = SkyKettle.MODE_HEAT # or BOIL_HEAT?
         if target_mode != self.current_mode:
             _LOGGER.info(f"Mode autoswitched to {target_mode} ({self.get_mode_name(target_mode)})")
-        await self._set_target_state(target_mode, target_temp)
+        return target_mode, target_temp
 
     async def set_target_mode(self, operation_mode):
         """Set new operation mode."""
         if operation_mode == self.target_mode_str: return # already set
         _LOGGER.info(f"Setting target mode to {operation_mode}")
+        await self._set_target_state(*self._target_for_mode(operation_mode))
+
+    def _target_for_mode(self, operation_mode):
+        """Target mode and temperature to switch to this mode."""
         target_mode = None
         # Get target mode ID
         vs = [k for k, v in SkyKettle.MODE_NAMES.items() if v == operation_mode]
@@ -410,7 +930,7 @@ class KettleConnection(SkyKettle):
             target_temp = self.limit_temp(target_temp)
         if target_temp != self.target_temp:
             _LOGGER.info(f"Target temperature autoswitched to {target_temp}")
-        await self._set_target_state(target_mode, target_temp)
+        return target_mode, target_temp
 
     @property
     def connected(self):
@@ -470,19 +990,19 @@ class KettleConnection(SkyKettle):
         return self._status.error_code
 
     def get_color(self, light_type, n):
-        if light_type not in self._colors: return None
+        if not self._colors.get(light_type, None): return None
         colors = self._colors[light_type]
         if n == 0: return colors.r_low, colors.g_low, colors.b_low
         if n == 1: return colors.r_mid, colors.g_mid, colors.b_mid
         if n == 2: return colors.r_high, colors.g_high, colors.b_high
 
     def get_brightness(self, light_type):
-        if light_type not in self._colors: return None
+        if not self._colors.get(light_type, None): return None
         colors = self._colors[light_type]
         return colors.brightness
 
     def get_temperature(self, light_type, n):
-        if light_type not in self._colors: return None
+        if not self._colors.get(light_type, None): return None
         colors = self._colors[light_type]
         if n == 0: return colors.temp_low
         if n == 1: return colors.temp_mid
@@ -526,6 +1046,58 @@ class KettleConnection(SkyKettle):
     async def impulse_color(self, r, g, b, brightness):
         await self.update(extra_action=super().impulse_color(r, g, b, brightness))
 
+    def stream_color(self, r, g, b, brightness=0xFF):
+        """Show the color in the light mode as soon as possible, without status reads.
+
+        Only the latest pending color is kept, so a slow link drops colors instead of lagging behind.
+        """
+        if self._disposed: return
+        if self._stream_color != None: self._stream_dropped += 1
+        self._stream_color = int(r), int(g), int(b), int(brightness)
+        if not self._stream_task or self._stream_task.done():
+            self._stream_task = asyncio.get_running_loop().create_task(self._stream())
+
+    async def _stream(self):
+        """Send pending colors back to back, every frame waits for the previous response only."""
+        while self._stream_color != None and not self._disposed:
+            color = self._stream_color
+            self._stream_color = None
+            try:
+                # Polls can run between frames
+                async with self._update_lock:
+                    await self._connect_if_need()
+                    await super().impulse_color(*color)
+                self._apply_queued_push() # Publishes the pushed status itself
+                now = monotonic()
+                self._stream_frames.append(now)
+                while self._stream_frames[0] < now - KettleConnection.STREAM_FPS_WINDOW:
+                    self._stream_frames.popleft()
+                if self._stream_publish_time + KettleConnection.STREAM_PUBLISH_INTERVAL < now:
+                    # Frame rate is visible during long streams too
+                    self._stream_publish_time = now
+                    self._publish_state()
+                    self._notify_update()
+            except Exception as ex:
+                _LOGGER.debug(f"Can't stream color ({type(ex).__name__}): {str(ex)}")
+                await self.disconnect()
+        self._publish_state()
+
+    @property
+    def streaming(self):
+        return self._stream_task != None and not self._stream_task.done()
+
+    @property
+    def stream_fps(self):
+        """Color frames per second achieved by the streaming sender recently."""
+        if not self._stream_frames or self._stream_frames[-1] < monotonic() - KettleConnection.STREAM_FPS_WINDOW: return 0
+        if len(self._stream_frames) < 2: return 0
+        return round((len(self._stream_frames) - 1) / max(self._stream_frames[-1] - self._stream_frames[0], 0.001), 1)
+
+    @property
+    def stream_dropped(self):
+        """Colors replaced by newer ones before they were sent."""
+        return self._stream_dropped
+
     async def set_sound(self, value):
         if await self.update(force_stats=False, extra_action=super().set_sound(value), commit=True):
             _LOGGER.info(f"Sound is set to {value}")
@@ -597,9 +1169,149 @@ class KettleConnection(SkyKettle):
         else:
             _LOGGER.error(f"Can't set lamp auto off hours to {hours}")
 
+    async def apply_profile(self, operation_mode=None, target_temp=None, boil_time=None, sound=None,
+            light_switches={}, colors={}, brightness={}, color_interval=None, lamp_auto_off_hours=None):
+        """Apply many settings at once, None - keep as is.
+
+        Settings are compared with the known state and only the changed ones are written,
+        all in one session with one commit.
+        colors and brightness are dicts by light type, colors are lists of (r, g, b) from the low temperature.
+        """
+        writes = []
+        if sound != None and sound != self.sound_enabled:
+            writes.append((SkyKettle.set_sound, sound))
+        known_switches = {SkyKettle.LIGHT_BOIL: self._light_switch_boil, SkyKettle.LIGHT_SYNC: self._light_switch_sync}
+        for light_type, value in light_switches.items():
+            if value != known_switches[light_type]:
+                writes.append((SkyKettle.set_light_switch, light_type, value))
+        for light_type in set(colors) | set(brightness):
+            if not self._colors.get(light_type, None):
+                _LOGGER.warning(f"Colors 0x{light_type:02X} are not known yet, skipped")
+                continue
+            new_colors = self._colors[light_type]
+            for n, (r, g, b) in enumerate(colors.get(light_type, [])):
+                if n == 0: new_colors = new_colors._replace(r_low=int(r), g_low=int(g), b_low=int(b))
+                if n == 1: new_colors = new_colors._replace(r_mid=int(r), g_mid=int(g), b_mid=int(b))
+                if n == 2: new_colors = new_colors._replace(r_high=int(r), g_high=int(g), b_high=int(b))
+            if light_type in brightness:
+                value = int(brightness[light_type])
+                new_colors = new_colors._replace(brightness=value, unknown1=value, unknown2=value)
+            if new_colors != self._colors[light_type]:
+                writes.append((SkyKettle.set_colors, new_colors))
+        if color_interval != None and int(color_interval) != self.color_interval:
+            writes.append((SkyKettle.set_lamp_color_interval, int(color_interval)))
+        if lamp_auto_off_hours != None and int(lamp_auto_off_hours) != self._lamp_auto_off_hours:
+            writes.append((SkyKettle.set_lamp_auto_off_hours, int(lamp_auto_off_hours)))
+        target = None
+        if operation_mode != None and operation_mode not in SkyKettle.MODE_NAMES.values():
+            # Off, like set_target_mode() does, the temperature doesn't matter
+            target = None, 0
+        elif target_temp != None:
+            target = self._target_for_temp(target_temp, operation_mode)
+        elif operation_mode != None:
+            target = self._target_for_mode(operation_mode)
+        if target != None:
+            target_mode, target_temp = target
+            if target_mode in [SkyKettle.MODE_LAMP, SkyKettle.MODE_GAME]:
+                # The stored temperature doesn't matter here, write it the same way as set_target_mode()
+                target = target_mode, target_temp = target_mode, 85
+            if target_mode == self.target_mode and (target_temp == self.target_temp or
+                    target_mode not in [SkyKettle.MODE_HEAT, SkyKettle.MODE_BOIL_HEAT]):
+                target = None # already set
+        if boil_time != None and int(boil_time) == self.boil_time: boil_time = None
+        if not writes and target == None and boil_time == None:
+            _LOGGER.info(f"Profile is already applied")
+            return True
+
+        _LOGGER.info(f"Applying profile: {len(writes)} settings, target={target}, boil_time={boil_time}")
+        self._last_get_stats = monotonic() # To avoid race condition
+        if target != None:
+            self._target_state = target
+            self._last_set_target = monotonic()
+        if boil_time != None:
+            self._target_boil_time = int(boil_time)
+        if await self.update(extra_action=self._write_settings(writes), commit=bool(writes) or boil_time != None):
+            _LOGGER.info(f"Profile is applied")
+            return True
+        _LOGGER.error(f"Can't apply profile")
+        return False
+
+    async def _write_settings(self, writes):
+        """Write settings using the protocol methods and update the known state."""
+        for method, *args in writes:
+            await method(self, *args)
+            if method == SkyKettle.set_light_switch:
+                light_type, value = args
+                if light_type == SkyKettle.LIGHT_BOIL: self._light_switch_boil = value
+                if light_type == SkyKettle.LIGHT_SYNC: self._light_switch_sync = value
+            elif method == SkyKettle.set_colors:
+                self._colors[args[0].light_type] = args[0]
+            elif method == SkyKettle.set_lamp_auto_off_hours:
+                self._lamp_auto_off_hours = args[0]
+
+    async def _sync_schedule(self, add=[], delete=[]):
+        """Read the schedule if the cached one may be outdated, then add and delete records."""
+        count, self._schedule_max = await self.get_schedule_count()
+        if (self._schedule == None or len(self._schedule) != count or self._schedule_time + KettleConnection.SCHEDULE_TTL < monotonic()
+                or not set(delete) <= {record.record_id for record in self._schedule}):
+            self._schedule = tuple([await self.get_schedule_record(i) for i in range(count)])
+            self._schedule_time = monotonic()
+        for record_id in delete:
+            if record_id not in [record.record_id for record in self._schedule]:
+                raise SkyKettleError(f"No schedule record {record_id}")
+        # Diff with the cached records, so nothing is written if the kettle already has it
+        current = {record[1:]: record for record in self._schedule if record.record_id not in delete}
+        add = [tuple(record) for record in add if tuple(record) not in current]
+        removed = [record for record in self._schedule if record.record_id in delete]
+        if not add and not removed: return
+        if len(current) + len(add) > self._schedule_max:
+            raise SkyKettleError(f"Too many schedule records, maximum is {self._schedule_max}")
+        for record in removed:
+            await super().del_schedule_record(record.record_id)
+        for record in add:
+            await super().add_schedule_record(*record)
+        # Record IDs are assigned by the kettle
+        self._schedule = None
+        await self._sync_schedule()
+
+    @property
+    def schedule_supported(self):
+        return self.model_code in [SkyKettle.MODELS_4] # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
+
+    @property
+    def schedule(self):
+        """Cached schedule records, None if not read yet."""
+        return self._schedule
+
+    async def read_schedule(self):
+        return await self.update(extra_action=self._sync_schedule())
+
+    async def add_schedule_record(self, start_time, mode, target_temp=0, boil_time=0):
+        if await self.update(extra_action=self._sync_schedule(add=[(int(start_time), mode, int(target_temp), int(boil_time))]), commit=True):
+            _LOGGER.info(f"Schedule record is added: {start_time}, mode={mode}, target_temp={target_temp}")
+            return True
+        _LOGGER.error(f"Can't add schedule record")
+        return False
+
+    async def del_schedule_record(self, record_id):
+        if await self.update(extra_action=self._sync_schedule(delete=[record_id]), commit=True):
+            _LOGGER.info(f"Schedule record {record_id} is deleted")
+            return True
+        _LOGGER.error(f"Can't delete schedule record {record_id}")
+        return False
+
 
 class AuthError(Exception):
     pass
 
 class DisposedError(Exception):
     pass
+
+class ReceiveTimeoutError(IOError):
+    pass
+
+class InvalidResponseError(IOError):
+    pass
+
+class DeviceNotFoundError(IOError):
+    pass
@@ -0,0 +1,43 @@
+"""Immutable snapshot of the kettle state."""
+from types import MappingProxyType
+
+
+class KettleState():
+    """State published by KettleConnection after every update, all derived values are precomputed."""
+    __slots__ = ("available", "stale", "connected", "auth_ok", "persistent", "sw_version", "success_rate", "success_rates", "error_counters", "polls_saved",
+        "command_latency", "command_latencies", "connect_time", "auth_time", "timeouts", "retries", "stream_fps", "stream_dropped",
+        "current_temp", "current_mode", "target_temp", "target_mode", "target_mode_str",
+        "sound_enabled", "color_interval", "boil_time", "parental_control", "error_code",
+        "lamp_auto_off_hours", "light_switch_boil", "light_switch_sync", "water_freshness_hours",
+        "ontime", "ontime_seconds", "energy_wh", "energy_kwh", "power_w", "heater_on_count", "user_on_count",
+        "colors", "brightness", "temperatures")
+
+    def __init__(self, **kwargs):
+        for name in KettleState.__slots__:
+            object.__setattr__(self, name, kwargs.get(name, None))
+        # Per light type values and statistics
+        for name in ["colors", "brightness", "temperatures", "success_rates", "error_counters",
+                "command_latency", "command_latencies", "connect_time", "auth_time"]:
+            object.__setattr__(self, name, MappingProxyType(dict(kwargs.get(name, None) or {})))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("KettleState is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("KettleState is immutable")
+
+    def __repr__(self):
+        return "KettleState(" + ", ".join([f"{name}={getattr(self, name)!r}" for name in KettleState.__slots__]) + ")"
+
+    def get_color(self, light_type, n):
+        colors = self.colors.get(light_type, None)
+        if not colors: return None
+        return colors[n]
+
+    def get_brightness(self, light_type):
+        return self.brightness.get(light_type, None)
+
+    def get_temperature(self, light_type, n):
+        temperatures = self.temperatures.get(light_type, None)
+        if not temperatures: return None
+        return temperatures[n]
@@ -1,14 +1,19 @@
 """SkyKettle."""
 import logging
+from dataclasses import dataclass
 
-from homeassistant.components.light import (ATTR_BRIGHTNESS, ATTR_RGB_COLOR,
-                                            ColorMode, LightEntity, LightEntityFeature)
+from homeassistant.components.light import (ATTR_BRIGHTNESS, ATTR_EFFECT,
+                                            ATTR_RGB_COLOR, EFFECT_OFF,
+                                            ColorMode, LightEntity,
+                                            LightEntityDescription,
+                                            LightEntityFeature)
 from homeassistant.const import CONF_FRIENDLY_NAME, STATE_OFF
-from homeassistant.helpers.dispatcher import (async_dispatcher_connect,
-                                              dispatcher_send)
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import EntityCategory
 
 from .const import *
+from .effects import EFFECTS, EffectRunner
+from .loop_monitor import MonitoredEntity
 from .skykettle import SkyKettle
 
 _LOGGER = logging.getLogger(__name__)
@@ -17,111 +22,101 @@ _LOGGER = logging.getLogger(__name__)
 LIGHT_GAME = "light"
 
 
+@dataclass(frozen=True, kw_only=True)
+class SkyLightEntityDescription(LightEntityDescription):
+    """Describes SkyKettle light entity."""
+    name_suffix: str
+    light_type: str | int
+    n: int = 0
+
+
+LIGHT_TYPES = (
+    SkyLightEntityDescription(
+        key=LIGHT_GAME,
+        name_suffix="light",
+        light_type=LIGHT_GAME
+    ),
+    *[SkyLightEntityDescription(
+        key=f"{SkyKettle.LIGHT_BOIL}_{n+1}",
+        name_suffix=f"temperature #{n+1} color",
+        icon=icon,
+        entity_category=EntityCategory.CONFIG,
+        light_type=SkyKettle.LIGHT_BOIL,
+        n=n
+    ) for n, icon in enumerate(["mdi:thermometer-low", "mdi:thermometer", "mdi:thermometer-high"])],
+    *[SkyLightEntityDescription(
+        key=f"{SkyKettle.LIGHT_LAMP}_{n+1}",
+        name_suffix=f"lamp #{n+1} color",
+        entity_category=EntityCategory.CONFIG,
+        light_type=SkyKettle.LIGHT_LAMP,
+        n=n
+    ) for n in range(3)],
+)
+
+
 async def async_setup_entry(hass, entry, async_add_entities, discovery_info=None):
     """Set up the SkyKettle entry."""
     model_code = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION].model_code
     if model_code in [SkyKettle.MODELS_4]: # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
-        async_add_entities([
-            KettleLight(hass, entry, LIGHT_GAME),
-            KettleLight(hass, entry, SkyKettle.LIGHT_BOIL, 0),
-            KettleLight(hass, entry, SkyKettle.LIGHT_BOIL, 1),
-            KettleLight(hass, entry, SkyKettle.LIGHT_BOIL, 2),
-            KettleLight(hass, entry, SkyKettle.LIGHT_LAMP, 0),
-            KettleLight(hass, entry, SkyKettle.LIGHT_LAMP, 1),
-            KettleLight(hass, entry, SkyKettle.LIGHT_LAMP, 2),
-        ])
-
-
-class KettleLight(LightEntity):
-    """Representation of a SkyKettle light device."""
+        async_add_entities([KettleLight(hass, entry, description) for description in LIGHT_TYPES])
 
-    def __init__(self, hass, entry, light_type, n = 0):
+
+class KettleLight(MonitoredEntity, LightEntity):
+    """Representation of a SkyKettle light device."""
+    entity_description: SkyLightEntityDescription
+    _attr_should_poll = False
+    _attr_assumed_state = False
+    _attr_supported_features = LightEntityFeature(0)
+    _attr_color_mode = ColorMode.RGB
+    _attr_supported_color_modes = {ColorMode.RGB}
+
+    def __init__(self, hass, entry, description):
         """Initialize the light device."""
         self.hass = hass
         self.entry = entry
-        self.light_type = light_type
-        self.n = n
+        self.entity_description = description
+        self.light_type = description.light_type
+        self.n = description.n
+        self.kettle = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION]
         self.on = False
         self.current = (0xFF, 0xFF, 0xFF, 0xFF)
+        self.effects = None
+        if self.light_type == LIGHT_GAME:
+            self._attr_supported_features = LightEntityFeature.EFFECT
+            self._attr_effect_list = [EFFECT_OFF, *EFFECTS]
+            self.effects = EffectRunner(self.kettle, on_finish=self.async_write_ha_state)
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_name = (FRIENDLY_NAME + " " + entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " " + description.name_suffix
 
     async def async_added_to_hass(self):
         self.update()
-        self.async_on_remove(async_dispatcher_connect(self.hass, DISPATCHER_UPDATE, self.update))
+        self.async_on_remove(async_dispatcher_connect(self.hass, DISPATCHER_UPDATE.format(self.entry.entry_id), self.update))
+
+    async def async_will_remove_from_hass(self):
+        if self.effects: self.effects.stop()
 
     def update(self):
         self.schedule_update_ha_state()
         if self.light_type == LIGHT_GAME:
-            if (self.kettle.target_mode == SkyKettle.MODE_GAME and
-                self.kettle.current_mode == SkyKettle.MODE_GAME):
+            state = self.kettle.state
+            if (state.target_mode == SkyKettle.MODE_GAME and
+                state.current_mode == SkyKettle.MODE_GAME):
                 if not self.on:
                     self.hass.create_task(self.async_turn_on())
             else:
                 self.on = False
-
-    @property
-    def kettle(self):
-        return self.hass.data[DOMAIN][self.entry.entry_id][DATA_CONNECTION]
-
-    @property
-    def unique_id(self):
-        if self.light_type == LIGHT_GAME:
-            return f"{self.entry.entry_id}_{self.light_type}"
-        else:
-            return f"{self.entry.entry_id}_{self.light_type}_{self.n+1}"
-
-    @property
-    def name(self):
-        """Name of the entity."""
-        if self.light_type == LIGHT_GAME:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " light"
-        if self.light_type == SkyKettle.LIGHT_BOIL:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + f" temperature #{self.n+1} color"
-        if self.light_type == SkyKettle.LIGHT_LAMP:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + f" lamp #{self.n+1} color"
-
-    @property
-    def icon(self):
-        if self.light_type == LIGHT_GAME:
-            return None
-        if self.light_type == SkyKettle.LIGHT_LAMP:
-            return None
-        if self.light_type == SkyKettle.LIGHT_BOIL:
-            if self.n == 0:
-                return "mdi:thermometer-low"
-            if self.n == 1:        
-                return "mdi:thermometer"        
-            if self.n == 2:
-                return "mdi:thermometer-high"
+                if self.effects: self.effects.stop()
 
     @property
     def device_info(self):
-        return self.hass.data[DOMAIN][DATA_DEVICE_INFO]()
-
-    @property
-    def entity_category(self):
-        return None
-
-    @property
-    def should_poll(self):
-        return False
-
-    @property
-    def assumed_state(self):
-        return False
+        return self.hass.data[DOMAIN][self.entry.entry_id][DATA_DEVICE_INFO]
 
     @property
     def available(self):
         if self.light_type == LIGHT_GAME:
-            return self.kettle.available
+            return self.kettle.state.available
         else:
-            return self.kettle.available and self.kettle.get_color(self.light_type, self.n) != None
-
-    @property
-    def entity_category(self):
-        if self.light_type == LIGHT_GAME:
-            return None
-        else:
-            return EntityCategory.CONFIG
+            return self.kettle.state.available and self.kettle.state.get_color(self.light_type, self.n) != None
 
     @property
     def rgb_color(self):
@@ -130,7 +125,7 @@ class KettleLight(LightEntity):
             r, g, b, brightness = self.current
             return r, g, b
         else:
-            return self.kettle.get_color(self.light_type, self.n)
+            return self.kettle.state.get_color(self.light_type, self.n)
 
     @property
     def brightness(self):
@@ -139,31 +134,31 @@ class KettleLight(LightEntity):
             r, g, b, brightness = self.current
             return brightness
         else:
-            return self.kettle.get_brightness(self.light_type)
+            return self.kettle.state.get_brightness(self.light_type)
+
+    @property
+    def effect(self):
+        if self.light_type != LIGHT_GAME: return None
+        return self.effects.effect or EFFECT_OFF
+
+    @property
+    def extra_state_attributes(self):
+        if self.light_type != LIGHT_GAME: return None
+        return {
+            "frames_per_second": self.kettle.state.stream_fps,
+            "dropped_frames": self.kettle.state.stream_dropped,
+            "effect_frames": self.effects.frames,
+            "effect_dropped_frames": self.effects.dropped,
+        }
 
     @property
     def is_on(self):
         """Return true if light is on."""
         if self.light_type == LIGHT_GAME:
-            return self.on and self.kettle.target_mode == SkyKettle.MODE_GAME
+            return self.on and self.kettle.state.target_mode == SkyKettle.MODE_GAME
         else:
             return True # Always on for other modes
 
-    @property
-    def supported_features(self):
-        """Flag supported features."""
-        return LightEntityFeature(0)
-
-    @property
-    def color_mode(self):
-        """Return the color mode of the light."""
-        return ColorMode.RGB
-
-    @property
-    def supported_color_modes(self):
-        """Flag supported color modes."""
-        return {ColorMode.RGB}
-
     async def async_turn_on(self, **kwargs):
         """Turn the light on."""
         _LOGGER.debug(f"Turn on ({self.light_type}): {kwargs}")
@@ -174,21 +169,32 @@ class KettleLight(LightEntity):
             if ATTR_BRIGHTNESS in kwargs:
                 brightness = kwargs[ATTR_BRIGHTNESS]
             _LOGGER.debug(f"Setting {self.light_type} color of the Kettle: r={r}, g={g}, b={b}, brightness={brightness}")
-            await self.kettle.set_target_mode(SkyKettle.MODE_NAMES[SkyKettle.MODE_GAME])
-            await self.kettle.impulse_color(r, g, b, brightness)
+            if self.kettle.state.target_mode != SkyKettle.MODE_GAME:
+                await self.kettle.set_target_mode(SkyKettle.MODE_NAMES[SkyKettle.MODE_GAME])
+            effect = kwargs.get(ATTR_EFFECT, self.effects.effect)
+            if effect in EFFECTS:
+                self.effects.start(effect, (r, g, b), brightness)
+            else:
+                self.effects.stop()
+                # Doesn't wait, the latest color wins if the link is busy
+                self.kettle.stream_color(r, g, b, brightness)
             self.on = True
             self.current = r, g, b, brightness
+            # Only this entity is changed
+            self.async_write_ha_state()
+            return
         else:
             if ATTR_RGB_COLOR in kwargs:
                 await self.kettle.set_color(self.light_type, self.n, kwargs[ATTR_RGB_COLOR])
             if ATTR_BRIGHTNESS in kwargs:
                 await self.kettle.set_brightness(self.light_type, kwargs[ATTR_BRIGHTNESS])
-        self.hass.async_add_executor_job(dispatcher_send, self.hass, DISPATCHER_UPDATE)
+        self.dispatch_update()
 
     async def async_turn_off(self, **kwargs):
         """Turn the light off."""
         _LOGGER.debug(f"Turn off ({self.light_type}): {kwargs}")
         if self.light_type == LIGHT_GAME:
+            self.effects.stop()
             await self.kettle.set_target_mode(STATE_OFF)
             self.on = False
-        self.hass.async_add_executor_job(dispatcher_send, self.hass, DISPATCHER_UPDATE)
+        self.dispatch_update()
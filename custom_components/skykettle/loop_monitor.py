@@ -0,0 +1,152 @@
+"""Event loop lag and callback cost monitor for SkyKettle."""
+import asyncio
+import logging
+from contextlib import nullcontext
+from time import monotonic, perf_counter
+
+from .const import DISPATCHER_UPDATE
+from .stats import LatencyHistogram
+
+_LOGGER = logging.getLogger(__name__)
+
+_NULL_MEASURE = nullcontext()
+
+
+class _Measure():
+    __slots__ = ("monitor", "name", "start")
+
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.monitor.add_callback(self.name, perf_counter() - self.start)
+
+
+class LoopMonitor():
+    """Measures event loop lag and time spent in the integration callbacks, does nothing while disabled.
+
+    One monitor is shared by all kettles, it's enabled while any of them needs it.
+    """
+    INTERVAL = 0.5
+    TOP_CALLBACKS = 10
+
+    def __init__(self):
+        self._enabled = False
+        self._owners = set()
+        self._task = None
+        self.reset()
+
+    def reset(self):
+        self.lag = LatencyHistogram()
+        self._callbacks = {} # name -> [count, total, max]
+        self._busy = 0
+        self._started = monotonic()
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    def set_enabled(self, owner, value):
+        """Enable or disable for the owner (a kettle), must be called from the event loop."""
+        if value:
+            self._owners.add(owner)
+        else:
+            self._owners.discard(owner)
+        value = len(self._owners) > 0
+        if value == self._enabled: return
+        self._enabled = value
+        if value:
+            self.reset()
+            self._task = asyncio.get_running_loop().create_task(self._probe())
+        elif self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _probe(self):
+        """Lag is how late the loop wakes us up."""
+        while True:
+            start = monotonic()
+            await asyncio.sleep(LoopMonitor.INTERVAL)
+            self.lag.add(max(0, monotonic() - start - LoopMonitor.INTERVAL))
+
+    def measure(self, name):
+        """Context manager which records the time spent in the block as a callback."""
+        if not self._enabled: return _NULL_MEASURE
+        return _Measure(self, name)
+
+    def wrap(self, name, func):
+        """Wrap the callback, so its cost is measured while the monitor is enabled."""
+        def wrapper(*args, **kwargs):
+            if not self._enabled: return func(*args, **kwargs)
+            with _Measure(self, name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def dispatch(self, hass, signal, name):
+        """Send the dispatcher signal from the executor, returns the executor job.
+
+        While enabled, the wait for the executor and the fan-out to the connected callbacks are measured.
+        """
+        # Imported here, the connection uses the monitor without Home Assistant too
+        from homeassistant.helpers.dispatcher import (async_dispatcher_send,
+                                                      dispatcher_send)
+        if not self._enabled:
+            return hass.async_add_executor_job(dispatcher_send, hass, signal)
+        submitted = perf_counter()
+        def fan_out():
+            self.add_callback(f"{name} executor wait", perf_counter() - submitted)
+            with _Measure(self, f"{name} fan-out"):
+                async_dispatcher_send(hass, signal)
+        return hass.async_add_executor_job(hass.loop.call_soon_threadsafe, fan_out)
+
+    def add_callback(self, name, seconds):
+        stats = self._callbacks.get(name, None)
+        if stats == None:
+            stats = self._callbacks[name] = [0, 0, 0]
+        stats[0] += 1
+        stats[1] += seconds
+        if seconds > stats[2]: stats[2] = seconds
+        self._busy += seconds
+
+    def report(self):
+        """Lag percentiles, share of the loop time used by the integration and the worst callbacks."""
+        elapsed = monotonic() - self._started
+        worst = sorted(self._callbacks.items(), key=lambda item: -item[1][2])[:LoopMonitor.TOP_CALLBACKS]
+        return {
+            "enabled": self._enabled,
+            "kettles": len(self._owners),
+            "seconds": round(elapsed),
+            "lag_ms": {**self.lag.summary(), "max": round(self.lag.max)},
+            "busy_ms_per_second": round(self._busy * 1000 / elapsed, 3) if elapsed else None,
+            "worst_callbacks": {
+                name: {
+                    "count": count,
+                    "mean_ms": round(total * 1000 / count, 3),
+                    "max_ms": round(worst_time * 1000, 3),
+                    "total_ms": round(total * 1000, 1)
+                }
+                for name, (count, total, worst_time) in worst
+            }
+        }
+
+
+class MonitoredEntity():
+    """Entity mixin which measures state writes while the kettle loop monitor is enabled."""
+
+    def schedule_update_ha_state(self, force_refresh=False):
+        monitor = self.kettle.monitor
+        if force_refresh or not monitor.enabled:
+            return super().schedule_update_ha_state(force_refresh)
+        self.hass.loop.call_soon_threadsafe(self._monitored_write_ha_state, monitor)
+
+    def _monitored_write_ha_state(self, monitor):
+        with monitor.measure(f"{self.entity_id} state write"):
+            self.async_write_ha_state()
+
+    def dispatch_update(self):
+        """Tell all entities of the kettle that its state is changed."""
+        self.kettle.monitor.dispatch(self.hass, DISPATCHER_UPDATE.format(self.entry.entry_id), f"{self.entity_id} update")
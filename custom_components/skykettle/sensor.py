@@ -1,7 +1,11 @@
 """SkyKettle."""
 import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
 
 from homeassistant.components.sensor import (SensorDeviceClass, SensorEntity,
+                                             SensorEntityDescription,
                                              SensorStateClass)
 from homeassistant.const import (CONF_FRIENDLY_NAME, PERCENTAGE, UnitOfEnergy,
                                  UnitOfPower, UnitOfTime)
@@ -9,6 +13,8 @@ from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import EntityCategory
 
 from .const import *
+from .kettle_state import KettleState
+from .loop_monitor import MonitoredEntity
 from .skykettle import SkyKettle
 
 _LOGGER = logging.getLogger(__name__)
@@ -16,6 +22,9 @@ _LOGGER = logging.getLogger(__name__)
 
 SENSOR_TYPE_WATER_FRESHNESS = "water_freshness"
 SENSOR_TYPE_SUCCESS_RATE = "success_rate"
+SENSOR_TYPE_COMMAND_LATENCY = "command_latency"
+SENSOR_TYPE_CONNECT_TIME = "connect_time"
+SENSOR_TYPE_AUTH_TIME = "auth_time"
 SENSOR_TYPE_ENERGY = "energy"
 SENSOR_TYPE_POWER = "power"
 SENSOR_TYPE_ONTIME = "ontime"
@@ -23,177 +32,173 @@ SENSOR_TYPE_HEATER_ON_COUNT = "heater_on_count"
 SENSOR_TYPE_USER_ON_COUNT = "user_on_count"
 
 
+@dataclass(frozen=True, kw_only=True)
+class SkySensorEntityDescription(SensorEntityDescription):
+    """Describes SkyKettle sensor entity."""
+    name_suffix: str
+    value_fn: Callable[[KettleState], Any]
+    available_fn: Callable[[KettleState], bool] | None = None
+    attributes_fn: Callable[[KettleState], dict] | None = None
+    model_codes: tuple | None = None # None - all models
+
+
+SENSOR_TYPES = (
+    SkySensorEntityDescription(
+        key=SENSOR_TYPE_SUCCESS_RATE,
+        name_suffix="success rate",
+        icon="mdi:bluetooth-connect",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+        value_fn=lambda state: state.success_rate,
+        available_fn=lambda state: True, # Always readable
+        attributes_fn=lambda state: {
+            **{f"success_rate_{window}": rate for window, rate in state.success_rates.items()},
+            **{f"errors_{name}": count for name, count in state.error_counters.items() if name != "success"}
+        }
+    ),
+    SkySensorEntityDescription(
+        key=SENSOR_TYPE_COMMAND_LATENCY,
+        name_suffix="command latency",
+        icon="mdi:timer-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda state: state.command_latency.get("p95", None),
+        available_fn=lambda state: state.command_latency.get("count", 0) > 0,
+        attributes_fn=lambda state: {
+            **state.command_latency,
+            "timeouts": state.timeouts,
+            "retries": state.retries,
+            "commands": dict(state.command_latencies)
+        }
+    ),
+    *[SkySensorEntityDescription(
+        key=key,
+        name_suffix=name_suffix,
+        icon="mdi:timer-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda state, slot=slot: getattr(state, slot).get("p50", None),
+        available_fn=lambda state, slot=slot: getattr(state, slot).get("count", 0) > 0,
+        attributes_fn=lambda state, slot=slot: dict(getattr(state, slot))
+    ) for key, name_suffix, slot in [
+        (SENSOR_TYPE_CONNECT_TIME, "connect time", "connect_time"),
+        (SENSOR_TYPE_AUTH_TIME, "auth time", "auth_time")
+    ]],
+    SkySensorEntityDescription(
+        key=SENSOR_TYPE_ENERGY,
+        name_suffix="total energy consumed",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda state: state.energy_kwh,
+        model_codes=(SkyKettle.MODELS_4,)
+    ),
+    SkySensorEntityDescription(
+        key=SENSOR_TYPE_POWER,
+        name_suffix="current power",
+        icon="mdi:flash",
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        value_fn=lambda state: state.power_w,
+        available_fn=lambda state: state.available and state.energy_wh is not None,
+        model_codes=(SkyKettle.MODELS_4,)
+    ),
+    SkySensorEntityDescription(
+        key=SENSOR_TYPE_ONTIME,
+        name_suffix="total work time",
+        icon="mdi:timelapse",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        value_fn=lambda state: state.ontime_seconds,
+        model_codes=(SkyKettle.MODELS_4,)
+    ),
+    SkySensorEntityDescription(
+        key=SENSOR_TYPE_HEATER_ON_COUNT,
+        name_suffix="heater on count",
+        icon="mdi:dip-switch",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda state: state.heater_on_count,
+        model_codes=(SkyKettle.MODELS_4,)
+    ),
+    SkySensorEntityDescription(
+        key=SENSOR_TYPE_USER_ON_COUNT,
+        name_suffix="user on count",
+        icon="mdi:dip-switch",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda state: state.user_on_count,
+        model_codes=(SkyKettle.MODELS_4,)
+    ),
+    SkySensorEntityDescription(
+        key=SENSOR_TYPE_WATER_FRESHNESS,
+        name_suffix="water freshness",
+        icon="mdi:water-sync",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        value_fn=lambda state: state.water_freshness_hours,
+        model_codes=(SkyKettle.MODELS_4,)
+    ),
+)
+
+
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the SkyKettle entry."""
     model_code = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION].model_code
     async_add_entities([
-        SkySensor(hass, entry, SENSOR_TYPE_SUCCESS_RATE),
+        SkySensor(hass, entry, description)
+        for description in SENSOR_TYPES
+        if description.model_codes == None or model_code in description.model_codes
     ])
-    if model_code in [SkyKettle.MODELS_4]: # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
-        async_add_entities([
-            SkySensor(hass, entry, SENSOR_TYPE_ENERGY),
-            SkySensor(hass, entry, SENSOR_TYPE_POWER),
-            SkySensor(hass, entry, SENSOR_TYPE_ONTIME),
-            SkySensor(hass, entry, SENSOR_TYPE_HEATER_ON_COUNT),
-            SkySensor(hass, entry, SENSOR_TYPE_USER_ON_COUNT),
-            SkySensor(hass, entry, SENSOR_TYPE_WATER_FRESHNESS),
-        ])
-
-class SkySensor(SensorEntity):
+
+
+class SkySensor(MonitoredEntity, SensorEntity):
     """Representation of a SkyKettle sensor device."""
+    entity_description: SkySensorEntityDescription
+    _attr_should_poll = False
+    _attr_assumed_state = False
+    _attr_last_reset = None
 
-    def __init__(self, hass, entry, sensor_type):
+    def __init__(self, hass, entry, description):
         """Initialize the sensor device."""
         self.hass = hass
         self.entry = entry
-        self.sensor_type = sensor_type
+        self.entity_description = description
+        self.sensor_type = description.key
+        self.kettle = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION]
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_name = (FRIENDLY_NAME + " " + entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " " + description.name_suffix
 
     async def async_added_to_hass(self):
         self.update()
-        self.async_on_remove(async_dispatcher_connect(self.hass, DISPATCHER_UPDATE, self.update))
+        self.async_on_remove(async_dispatcher_connect(self.hass, DISPATCHER_UPDATE.format(self.entry.entry_id), self.update))
 
     def update(self):
         self.schedule_update_ha_state()
 
-    @property
-    def kettle(self):
-        return self.hass.data[DOMAIN][self.entry.entry_id][DATA_CONNECTION]
-
-    @property
-    def unique_id(self):
-        return f"{self.entry.entry_id}_{self.sensor_type}"
-
     @property
     def device_info(self):
-        return self.hass.data[DOMAIN][DATA_DEVICE_INFO]()
-
-    @property
-    def should_poll(self):
-        return False
-
-    @property
-    def assumed_state(self):
-        return False
-
-    @property
-    def last_reset(self):
-        return None
-
-    @property
-    def name(self):
-        """Name of the entity."""
-        if self.sensor_type == SENSOR_TYPE_ENERGY:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " total energy consumed"
-        if self.sensor_type == SENSOR_TYPE_POWER:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " current power"
-        if self.sensor_type == SENSOR_TYPE_ONTIME:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " total work time"
-        if self.sensor_type == SENSOR_TYPE_HEATER_ON_COUNT:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " heater on count"
-        if self.sensor_type == SENSOR_TYPE_USER_ON_COUNT:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " user on count"
-        if self.sensor_type == SENSOR_TYPE_WATER_FRESHNESS:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " water freshness"
-        if self.sensor_type == SENSOR_TYPE_SUCCESS_RATE:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " success rate"
-
-    @property
-    def icon(self):
-        if self.sensor_type == SENSOR_TYPE_ONTIME:
-            return "mdi:timelapse"
-        if self.sensor_type == SENSOR_TYPE_HEATER_ON_COUNT:
-            return "mdi:dip-switch"
-        if self.sensor_type == SENSOR_TYPE_USER_ON_COUNT:
-            return "mdi:dip-switch"
-        if self.sensor_type == SENSOR_TYPE_WATER_FRESHNESS:
-            return "mdi:water-sync"
-        if self.sensor_type == SENSOR_TYPE_POWER:
-            return "mdi:flash"
-        if self.sensor_type == SENSOR_TYPE_SUCCESS_RATE:
-            return "mdi:bluetooth-connect"
-        return None
+        return self.hass.data[DOMAIN][self.entry.entry_id][DATA_DEVICE_INFO]
 
     @property
     def available(self):
-        if self.sensor_type == SENSOR_TYPE_ENERGY:
-            return self.kettle.available and self.kettle.energy_wh != None
-        if self.sensor_type == SENSOR_TYPE_POWER:
-            return self.kettle.available and self.kettle.energy_wh is not None
-        if self.sensor_type == SENSOR_TYPE_ONTIME:
-            return self.kettle.available and self.kettle.ontime != None
-        if self.sensor_type == SENSOR_TYPE_HEATER_ON_COUNT:
-            return self.kettle.available and self.kettle.heater_on_count != None
-        if self.sensor_type == SENSOR_TYPE_USER_ON_COUNT:
-            return self.kettle.available and self.kettle.user_on_count != None
-        if self.sensor_type == SENSOR_TYPE_WATER_FRESHNESS:
-            return self.kettle.available and self.kettle.water_freshness_hours != None
-        if self.sensor_type == SENSOR_TYPE_SUCCESS_RATE:
-            return True # Always readable
-
-    @property
-    def entity_category(self):
-        if self.sensor_type == SENSOR_TYPE_SUCCESS_RATE:
-            return EntityCategory.DIAGNOSTIC
-        return None
-
-    @property
-    def device_class(self):
-        if self.sensor_type == SENSOR_TYPE_ENERGY:
-            return SensorDeviceClass.ENERGY
-        if self.sensor_type == SENSOR_TYPE_POWER:
-            return SensorDeviceClass.POWER
-        if self.sensor_type == SENSOR_TYPE_ONTIME:
-            return SensorDeviceClass.DURATION
-        if self.sensor_type == SENSOR_TYPE_WATER_FRESHNESS:
-            return SensorDeviceClass.DURATION
-        return None # Unusual class
+        state = self.kettle.state
+        if self.entity_description.available_fn:
+            return self.entity_description.available_fn(state)
+        return state.available and self.entity_description.value_fn(state) != None
 
     @property
-    def state_class(self):
-        if self.sensor_type == SENSOR_TYPE_ENERGY:
-            return SensorStateClass.TOTAL_INCREASING
-        if self.sensor_type == SENSOR_TYPE_POWER:
-            return SensorStateClass.MEASUREMENT
-        if self.sensor_type == SENSOR_TYPE_ONTIME:
-            return SensorStateClass.TOTAL_INCREASING
-        if self.sensor_type == SENSOR_TYPE_HEATER_ON_COUNT:
-            return SensorStateClass.TOTAL_INCREASING
-        if self.sensor_type == SENSOR_TYPE_USER_ON_COUNT:
-            return SensorStateClass.TOTAL_INCREASING
-        if self.sensor_type == SENSOR_TYPE_WATER_FRESHNESS:
-            return SensorStateClass.MEASUREMENT
-        if self.sensor_type == SENSOR_TYPE_SUCCESS_RATE:
-            return SensorStateClass.MEASUREMENT
+    def native_value(self):
+        return self.entity_description.value_fn(self.kettle.state)
 
     @property
-    def native_unit_of_measurement(self):
-        if self.sensor_type == SENSOR_TYPE_ENERGY:
-            return UnitOfEnergy.KILO_WATT_HOUR
-        if self.sensor_type == SENSOR_TYPE_POWER:
-            return UnitOfPower.WATT
-        if self.sensor_type == SENSOR_TYPE_ONTIME:
-            return UnitOfTime.SECONDS
-        if self.sensor_type == SENSOR_TYPE_WATER_FRESHNESS:
-            return UnitOfTime.HOURS
-        if self.sensor_type == SENSOR_TYPE_SUCCESS_RATE:
-            return PERCENTAGE
+    def extra_state_attributes(self):
+        if self.entity_description.attributes_fn:
+            return self.entity_description.attributes_fn(self.kettle.state)
         return None
-
-    @property
-    def native_value(self):
-        if self.sensor_type == SENSOR_TYPE_ENERGY:
-            e = self.kettle.energy_wh
-            return round(e / 1000.0, 2) if e is not None else None
-        if self.sensor_type == SENSOR_TYPE_POWER:
-            pw = self.kettle.power_w
-            return pw
-        if self.sensor_type == SENSOR_TYPE_ONTIME:
-            return self.kettle.ontime.total_seconds()
-        if self.sensor_type == SENSOR_TYPE_HEATER_ON_COUNT:
-            return self.kettle.heater_on_count
-        if self.sensor_type == SENSOR_TYPE_USER_ON_COUNT:
-            return self.kettle.user_on_count
-        if self.sensor_type == SENSOR_TYPE_WATER_FRESHNESS:
-            return self.kettle.water_freshness_hours
-        if self.sensor_type == SENSOR_TYPE_SUCCESS_RATE:
-            return self.kettle.success_rate
@@ -0,0 +1,193 @@
+"""Services of the SkyKettle integration."""
+import logging
+
+import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
+import voluptuous as vol
+from homeassistant.const import (ATTR_DEVICE_ID, ATTR_MODE, ATTR_NAME,
+                                 ATTR_TEMPERATURE, ATTR_TIME, STATE_OFF)
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
+
+from .const import *
+from .skykettle import SkyKettle
+
+_LOGGER = logging.getLogger(__name__)
+
+SCHEDULE_MODES = [SkyKettle.MODE_BOIL, SkyKettle.MODE_HEAT, SkyKettle.MODE_BOIL_HEAT]
+
+ADD_SCHEDULE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_DEVICE_ID): cv.string,
+    vol.Required(ATTR_TIME): cv.datetime,
+    vol.Required(ATTR_MODE): vol.In([SkyKettle.MODE_NAMES[mode] for mode in SCHEDULE_MODES]),
+    vol.Optional(ATTR_TEMPERATURE, default=SkyKettle.MAX_TEMP): vol.All(vol.Coerce(int), vol.Range(min=SkyKettle.MIN_TEMP, max=SkyKettle.MAX_TEMP)),
+    vol.Optional(ATTR_BOIL_TIME, default=0): vol.All(vol.Coerce(int), vol.Range(min=-5, max=5)),
+})
+DELETE_SCHEDULE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_DEVICE_ID): cv.string,
+    vol.Required(ATTR_RECORD_ID): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+})
+LIST_SCHEDULE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_DEVICE_ID): cv.string,
+})
+
+RGB_COLORS = vol.All(cv.ensure_list, vol.Length(min=1, max=3),
+    [vol.All(vol.ExactSequence((cv.byte, cv.byte, cv.byte)), vol.Coerce(list))])
+# Settings of a profile, stored as is
+PROFILE_SETTINGS = {
+    vol.Optional(ATTR_MODE): vol.In([STATE_OFF, *SkyKettle.MODE_NAMES.values()]),
+    vol.Optional(ATTR_TEMPERATURE): vol.All(vol.Coerce(int), vol.Range(min=0, max=BOIL_TEMP)),
+    vol.Optional(ATTR_BOIL_TIME): vol.All(vol.Coerce(int), vol.Range(min=-5, max=5)),
+    vol.Optional(ATTR_SOUND): cv.boolean,
+    vol.Optional(ATTR_BOIL_LIGHT): cv.boolean,
+    vol.Optional(ATTR_SYNC_LIGHT): cv.boolean,
+    vol.Optional(ATTR_BOIL_COLORS): RGB_COLORS,
+    vol.Optional(ATTR_BOIL_BRIGHTNESS): cv.byte,
+    vol.Optional(ATTR_LAMP_COLORS): RGB_COLORS,
+    vol.Optional(ATTR_LAMP_BRIGHTNESS): cv.byte,
+    vol.Optional(ATTR_LAMP_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=30, max=180)),
+    vol.Optional(ATTR_LAMP_AUTO_OFF_HOURS): vol.All(vol.Coerce(int), vol.Range(min=1, max=24)),
+}
+APPLY_PROFILE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_DEVICE_ID): cv.string,
+    vol.Optional(ATTR_PROFILE): cv.string,
+    **PROFILE_SETTINGS,
+})
+SAVE_PROFILE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_DEVICE_ID): cv.string,
+    vol.Required(ATTR_NAME): cv.string,
+    **PROFILE_SETTINGS,
+})
+DELETE_PROFILE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_DEVICE_ID): cv.string,
+    vol.Required(ATTR_NAME): cv.string,
+})
+
+
+def get_entry_data(hass, device_id):
+    """Integration data of the device config entry."""
+    device = dr.async_get(hass).async_get(device_id)
+    if device:
+        for entry_id in device.config_entries:
+            data = hass.data.get(DOMAIN, {}).get(entry_id, None)
+            if data and DATA_CONNECTION in data:
+                return data
+    raise HomeAssistantError(f"Device {device_id} is not a loaded SkyKettle")
+
+
+def get_connection(hass, device_id, write=False):
+    """KettleConnection of the device, it must support the schedule."""
+    data = get_entry_data(hass, device_id)
+    kettle = data[DATA_CONNECTION]
+    if not kettle.schedule_supported:
+        raise HomeAssistantError(f"Schedule is not supported by {kettle.model}")
+    # The record format is not confirmed yet, don't write it unless asked to
+    if write and not data[DATA_SCHEDULE_WRITES]:
+        raise HomeAssistantError("Schedule changes are experimental, enable them in the integration options")
+    return kettle
+
+
+def profile_settings(data):
+    """Profile settings from the service call data."""
+    return {key.schema: data[key.schema] for key in PROFILE_SETTINGS if key.schema in data}
+
+
+async def apply_settings(kettle, settings):
+    """Apply profile settings to the kettle."""
+    colors = {}
+    brightness = {}
+    light_switches = {}
+    if ATTR_BOIL_COLORS in settings: colors[SkyKettle.LIGHT_BOIL] = settings[ATTR_BOIL_COLORS]
+    if ATTR_LAMP_COLORS in settings: colors[SkyKettle.LIGHT_LAMP] = settings[ATTR_LAMP_COLORS]
+    if ATTR_BOIL_BRIGHTNESS in settings: brightness[SkyKettle.LIGHT_BOIL] = settings[ATTR_BOIL_BRIGHTNESS]
+    if ATTR_LAMP_BRIGHTNESS in settings: brightness[SkyKettle.LIGHT_LAMP] = settings[ATTR_LAMP_BRIGHTNESS]
+    if ATTR_BOIL_LIGHT in settings: light_switches[SkyKettle.LIGHT_BOIL] = settings[ATTR_BOIL_LIGHT]
+    if ATTR_SYNC_LIGHT in settings: light_switches[SkyKettle.LIGHT_SYNC] = settings[ATTR_SYNC_LIGHT]
+    return await kettle.apply_profile(
+        operation_mode=settings.get(ATTR_MODE, None),
+        target_temp=settings.get(ATTR_TEMPERATURE, None),
+        boil_time=settings.get(ATTR_BOIL_TIME, None),
+        sound=settings.get(ATTR_SOUND, None),
+        light_switches=light_switches,
+        colors=colors,
+        brightness=brightness,
+        color_interval=settings.get(ATTR_LAMP_INTERVAL, None),
+        lamp_auto_off_hours=settings.get(ATTR_LAMP_AUTO_OFF_HOURS, None),
+    )
+
+
+def schedule_response(kettle):
+    return {
+        "records": [
+            {
+                ATTR_RECORD_ID: record.record_id,
+                ATTR_TIME: dt_util.as_local(dt_util.utc_from_timestamp(record.time)).isoformat(),
+                ATTR_MODE: SkyKettle.MODE_NAMES.get(record.mode, None),
+                ATTR_TEMPERATURE: record.target_temp if record.mode != SkyKettle.MODE_BOIL else None,
+                ATTR_BOIL_TIME: record.boil_time,
+            }
+            for record in kettle.schedule or []
+        ]
+    }
+
+
+def async_setup_services(hass: HomeAssistant):
+    """Register services once for all kettles."""
+
+    async def add_schedule(call: ServiceCall):
+        kettle = get_connection(hass, call.data[ATTR_DEVICE_ID], write=True)
+        # Time without a time zone is in the Home Assistant one, the kettle gets UTC unix time like sync_time() sends
+        start_time = dt_util.as_utc(call.data[ATTR_TIME]).timestamp()
+        if start_time <= dt_util.utcnow().timestamp():
+            raise HomeAssistantError("Schedule time must be in the future")
+        mode = [k for k, v in SkyKettle.MODE_NAMES.items() if v == call.data[ATTR_MODE]][0]
+        target_temp = call.data[ATTR_TEMPERATURE] if mode != SkyKettle.MODE_BOIL else 0
+        if not await kettle.add_schedule_record(start_time, mode, target_temp, call.data[ATTR_BOIL_TIME]):
+            raise HomeAssistantError("Can't add schedule record, see logs")
+        return schedule_response(kettle)
+
+    async def delete_schedule(call: ServiceCall):
+        kettle = get_connection(hass, call.data[ATTR_DEVICE_ID], write=True)
+        if not await kettle.del_schedule_record(call.data[ATTR_RECORD_ID]):
+            raise HomeAssistantError("Can't delete schedule record, see logs")
+        return schedule_response(kettle)
+
+    async def list_schedule(call: ServiceCall):
+        kettle = get_connection(hass, call.data[ATTR_DEVICE_ID])
+        if not await kettle.read_schedule():
+            raise HomeAssistantError("Can't read schedule, see logs")
+        return schedule_response(kettle)
+
+    async def apply_profile(call: ServiceCall):
+        data = get_entry_data(hass, call.data[ATTR_DEVICE_ID])
+        settings = {}
+        if ATTR_PROFILE in call.data:
+            if call.data[ATTR_PROFILE] not in data[DATA_PROFILES]:
+                raise HomeAssistantError(f"Unknown profile: {call.data[ATTR_PROFILE]}")
+            settings.update(data[DATA_PROFILES][call.data[ATTR_PROFILE]])
+        # Settings of the call override the profile ones
+        settings.update(profile_settings(call.data))
+        if not await apply_settings(data[DATA_CONNECTION], settings):
+            raise HomeAssistantError("Can't apply profile, see logs")
+
+    async def save_profile(call: ServiceCall):
+        data = get_entry_data(hass, call.data[ATTR_DEVICE_ID])
+        data[DATA_PROFILES][call.data[ATTR_NAME]] = profile_settings(call.data)
+        await data[DATA_PROFILE_STORE].async_save(data[DATA_PROFILES])
+
+    async def delete_profile(call: ServiceCall):
+        data = get_entry_data(hass, call.data[ATTR_DEVICE_ID])
+        if data[DATA_PROFILES].pop(call.data[ATTR_NAME], None) == None:
+            raise HomeAssistantError(f"Unknown profile: {call.data[ATTR_NAME]}")
+        await data[DATA_PROFILE_STORE].async_save(data[DATA_PROFILES])
+
+    hass.services.async_register(DOMAIN, SERVICE_ADD_SCHEDULE, add_schedule,
+        schema=ADD_SCHEDULE_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, SERVICE_DELETE_SCHEDULE, delete_schedule,
+        schema=DELETE_SCHEDULE_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, SERVICE_LIST_SCHEDULE, list_schedule,
+        schema=LIST_SCHEDULE_SCHEMA, supports_response=SupportsResponse.ONLY)
+    hass.services.async_register(DOMAIN, SERVICE_APPLY_PROFILE, apply_profile, schema=APPLY_PROFILE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_SAVE_PROFILE, save_profile, schema=SAVE_PROFILE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_DELETE_PROFILE, delete_profile, schema=DELETE_PROFILE_SCHEMA)
@@ -105,6 +105,7 @@ class SkyKettle():
         "color_interval", "parental_control", "is_on", "error_code", "boil_time"])
     Stats = namedtuple("Stats", ["ontime", "energy_wh", "heater_on_count", "user_on_count"])
     FreshWaterInfo = namedtuple("FreshWaterInfo", ["is_on", "unknown1", "water_freshness_hours"])
+    ScheduleRecord = namedtuple("ScheduleRecord", ["record_id", "time", "mode", "target_temp", "boil_time"])
 
 
     def __init__(self, model):
@@ -189,6 +190,9 @@ class SkyKettle():
 
     async def get_status(self):
         r = await self.command(SkyKettle.COMMAND_GET_STATUS)
+        return self.decode_status(r)
+
+    def decode_status(self, r):
         # if self.model_code in [MODELS_1] # ???
         if self.model_code in [SkyKettle.MODELS_2, SkyKettle.MODELS_3]: # RK-M173S (?), RK-G200
             mode, target_temp, is_on, current_temp = unpack("<BxBxxxxx?xBxxxxx", r)
@@ -378,6 +382,46 @@ class SkyKettle():
         else:
             _LOGGER.debug(f"get_stats is not supported by this model")
 
+    # Schedule record layout is a best guess, not confirmed with the official app traffic yet:
+    # record id, unix time of start (4 bytes, UTC like sync_time, the kettle applies the offset itself),
+    # mode, target temperature, boil time + 0x80. Writes are allowed only by the experimental option.
+    async def get_schedule_count(self):
+        if self.model_code in [SkyKettle.MODELS_4]: # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
+            r = await self.command(SkyKettle.COMMAND_GET_SCHEDULE_COUNT)
+            count, max_count = unpack("BB", r[:2])
+            _LOGGER.debug(f"Schedule records: {count}/{max_count}")
+            return count, max_count
+        else:
+            _LOGGER.debug(f"get_schedule_count is not supported by this model")
+
+    async def get_schedule_record(self, index):
+        if self.model_code in [SkyKettle.MODELS_4]: # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
+            r = await self.command(SkyKettle.COMMAND_GET_SCHEDULE_RECORD, [index])
+            record = SkyKettle.ScheduleRecord(*unpack("<BLBBB", r[:8]))
+            record = record._replace(boil_time=record.boil_time - 0x80)
+            _LOGGER.debug(f"{record}")
+            return record
+        else:
+            _LOGGER.debug(f"get_schedule_record is not supported by this model")
+
+    async def add_schedule_record(self, start_time, mode, target_temp=0, boil_time=0):
+        if self.model_code in [SkyKettle.MODELS_4]: # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
+            data = pack("<BLBBB", 0, int(start_time), int(mode), int(target_temp), int(0x80 + boil_time))
+            r = await self.command(SkyKettle.COMMAND_ADD_SCHEDULE_RECORD, data)
+            if r[0] != 1: raise SkyKettleError("can't add schedule record")
+            _LOGGER.debug(f"Schedule record added: time={start_time} ({datetime.fromtimestamp(start_time).strftime('%Y-%m-%d %H:%M:%S')}), "+
+                f"mode={mode} ({SkyKettle.MODE_NAMES[mode]}), target_temp={target_temp}, boil_time={boil_time}")
+        else:
+            _LOGGER.debug(f"add_schedule_record is not supported by this model")
+
+    async def del_schedule_record(self, record_id):
+        if self.model_code in [SkyKettle.MODELS_4]: # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
+            r = await self.command(SkyKettle.COMMAND_DEL_SCHEDULE_RECORD, [record_id])
+            if r[0] != 1: raise SkyKettleError("can't delete schedule record")
+            _LOGGER.debug(f"Schedule record {record_id} deleted")
+        else:
+            _LOGGER.debug(f"del_schedule_record is not supported by this model")
+
 
 class SkyKettleError(Exception):
     pass
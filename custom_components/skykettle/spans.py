@@ -0,0 +1,63 @@
+"""Timing spans of update phases, written as JSON lines."""
+import json
+from contextlib import nullcontext
+from time import monotonic, time
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span():
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = monotonic()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.add(self.name, self.start, exc)
+
+
+class SpanRecorder():
+    """Collects spans of update cycles, does nothing while disabled."""
+
+    def __init__(self):
+        self.enabled = False
+        # Cycle IDs are unique between restarts, cycles are much rarer than milliseconds
+        self._cycle = int(time() * 1000)
+        self._spans = []
+
+    def start_cycle(self):
+        self._cycle += 1
+
+    def span(self, name):
+        """Context manager which records the time spent in the block."""
+        if not self.enabled: return _NULL_SPAN
+        return _Span(self, name)
+
+    def add(self, name, start, ex=None):
+        """Record span started at monotonic time start and finished now."""
+        if not self.enabled: return
+        now = monotonic()
+        self._spans.append((self._cycle, name, time() - (now - start), now - start, type(ex).__name__ if ex else None))
+
+    def pop_lines(self, **fields):
+        """Recorded spans as JSON lines with extra fields, removes them from the recorder."""
+        spans = self._spans
+        self._spans = []
+        return [json.dumps({
+            **fields,
+            "cycle": cycle,
+            "phase": name,
+            "time": round(start, 3),
+            "duration_ms": round(duration * 1000, 1),
+            "error": error
+        }) for cycle, name, start, duration, error in spans]
+
+
+def append_lines(path, lines):
+    """Blocking, run it in the executor."""
+    with open(path, "a") as f:
+        f.write("".join(line + "\n" for line in lines))
@@ -0,0 +1,227 @@
+"""Connection statistics for SkyKettle."""
+from array import array
+from bisect import bisect_left
+from collections import deque
+from math import ceil
+from time import monotonic
+
+OUTCOME_SUCCESS = 0
+OUTCOME_TIMEOUT = 1
+OUTCOME_AUTH = 2
+OUTCOME_NOT_FOUND = 3
+OUTCOME_DECODE = 4
+OUTCOME_OTHER = 5
+OUTCOME_NAMES = {
+    OUTCOME_SUCCESS: "success",
+    OUTCOME_TIMEOUT: "timeout",
+    OUTCOME_AUTH: "auth",
+    OUTCOME_NOT_FOUND: "not_found",
+    OUTCOME_DECODE: "decode",
+    OUTCOME_OTHER: "other"
+}
+
+
+class OutcomeRing():
+    """Fixed-size ring buffer of timestamped update outcomes with rolling success rates.
+
+    Every window keeps its own tail and counters, so both adding an outcome
+    and reading a rate are O(1) amortized.
+    """
+    SIZE = 17280 # 24 hours of polls with the default 5 seconds interval
+    WINDOWS = {"5m": 5 * 60, "1h": 60 * 60, "24h": 24 * 60 * 60}
+
+    def __init__(self, size=SIZE, clock=monotonic):
+        self._size = size
+        self._clock = clock
+        self._times = array("d", [0.0]) * size
+        self._outcomes = array("B", [0]) * size
+        self._head = 0 # Next index to write
+        self._count = 0
+        self._windows = list(OutcomeRing.WINDOWS.values())
+        self._tails = [0] * len(self._windows) # Oldest entry in the window
+        self._totals = [0] * len(self._windows)
+        self._successes = [0] * len(self._windows)
+        self._counters = array("L", [0]) * len(OUTCOME_NAMES) # Since start
+
+    def add(self, outcome):
+        now = self._clock()
+        if self._count == self._size:
+            # Oldest entry will be overwritten, remove it from windows which still include it
+            for i in range(len(self._windows)):
+                if self._totals[i] and self._tails[i] == self._head:
+                    self._pop(i)
+        else:
+            self._count += 1
+        self._times[self._head] = now
+        self._outcomes[self._head] = outcome
+        self._head = (self._head + 1) % self._size
+        for i in range(len(self._windows)):
+            self._totals[i] += 1
+            if outcome == OUTCOME_SUCCESS: self._successes[i] += 1
+        self._counters[outcome] += 1
+        self._expire(now)
+
+    def _pop(self, i):
+        tail = self._tails[i]
+        self._totals[i] -= 1
+        if self._outcomes[tail] == OUTCOME_SUCCESS: self._successes[i] -= 1
+        self._tails[i] = (tail + 1) % self._size
+
+    def _expire(self, now):
+        for i, window in enumerate(self._windows):
+            while self._totals[i] and self._times[self._tails[i]] + window < now:
+                self._pop(i)
+
+    def success_rates(self):
+        """Success rate in percents for every window, None if there were no updates."""
+        self._expire(self._clock())
+        return {
+            name: int(100 * self._successes[i] / self._totals[i]) if self._totals[i] else None
+            for i, name in enumerate(OutcomeRing.WINDOWS)
+        }
+
+    def success_rate(self, window):
+        return self.success_rates()[window]
+
+    def counters(self):
+        """Number of outcomes of every type since start."""
+        return {name: self._counters[outcome] for outcome, name in OUTCOME_NAMES.items()}
+
+
+class LatencyHistogram():
+    """Latency histogram with fixed buckets, percentiles are reported as bucket upper bounds."""
+    BOUNDS = (5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000) # ms
+
+    def __init__(self):
+        self._counts = array("L", [0]) * (len(LatencyHistogram.BOUNDS) + 1) # Last one is overflow
+        self.count = 0
+        self.max = 0
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self._counts[bisect_left(LatencyHistogram.BOUNDS, ms)] += 1
+        self.count += 1
+        if ms > self.max: self.max = ms
+
+    def percentile(self, p):
+        """Upper bound of the bucket with p percent of values in ms, None if there are no values."""
+        if not self.count: return None
+        rank = max(1, ceil(self.count * p / 100))
+        total = 0
+        for i, count in enumerate(self._counts):
+            total += count
+            if total >= rank: break
+        if i < len(LatencyHistogram.BOUNDS):
+            return min(LatencyHistogram.BOUNDS[i], round(self.max))
+        return round(self.max)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99)
+        }
+
+
+class LatencySamples():
+    """Exact latencies of a few values, same summary as LatencyHistogram plus the max."""
+
+    def __init__(self):
+        self._values = [] # ms
+        self.count = 0
+        self.max = 0
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self._values.append(ms)
+        self.count += 1
+        if ms > self.max: self.max = ms
+
+    def percentile(self, p):
+        """Nearest rank value in ms, None if there are no values."""
+        if not self.count: return None
+        return round(sorted(self._values)[max(1, ceil(self.count * p / 100)) - 1], 1)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": round(self.max, 1) if self.count else None
+        }
+
+
+class TimingStats():
+    """Timing statistics of the connection: per command latencies, timeouts, retries, connect and auth durations."""
+    SAMPLES = 256 # Last raw durations kept for since()
+
+    def __init__(self, latencies=LatencyHistogram):
+        self._latencies = latencies
+        self.command = latencies() # All commands
+        self.commands = {}
+        self.timeouts = {}
+        self.connect = latencies()
+        self.auth = latencies()
+        self.retries = 0
+        self._samples = deque(maxlen=TimingStats.SAMPLES) # (number, kind, command, seconds)
+        self._sample_count = 0
+
+    def _add_sample(self, kind, command, seconds):
+        self._sample_count += 1
+        self._samples.append((self._sample_count, kind, command, seconds))
+
+    def copy(self):
+        """Point to take since() from, only counters are copied."""
+        timings = TimingStats()
+        timings.timeouts = dict(self.timeouts)
+        timings.retries = self.retries
+        timings._sample_count = self._sample_count
+        return timings
+
+    def since(self, earlier):
+        """Exact statistics of everything after the earlier copy, e.g. of one poll.
+
+        Only the last SAMPLES durations are kept, older ones are missing.
+        """
+        timings = TimingStats(LatencySamples)
+        for number, kind, command, seconds in self._samples:
+            if number <= earlier._sample_count: continue
+            if kind == "command":
+                timings.add_command(command, seconds)
+            else:
+                getattr(timings, kind).add(seconds)
+        timings.timeouts = {command: count - earlier.timeouts.get(command, 0)
+            for command, count in self.timeouts.items() if count > earlier.timeouts.get(command, 0)}
+        timings.retries = self.retries - earlier.retries
+        return timings
+
+    def add_command(self, command, seconds):
+        self.command.add(seconds)
+        histogram = self.commands.get(command, None)
+        if histogram == None:
+            histogram = self.commands[command] = self._latencies()
+        histogram.add(seconds)
+        self._add_sample("command", command, seconds)
+
+    def add_connect(self, seconds):
+        self.connect.add(seconds)
+        self._add_sample("connect", None, seconds)
+
+    def add_auth(self, seconds):
+        self.auth.add(seconds)
+        self._add_sample("auth", None, seconds)
+
+    def add_timeout(self, command):
+        self.timeouts[command] = self.timeouts.get(command, 0) + 1
+
+    def command_summaries(self, names):
+        """Summary for every used command, names maps command codes to readable names."""
+        return {
+            names.get(command, f"{command:02x}"): {
+                **(self.commands[command] if command in self.commands else self._latencies()).summary(),
+                "timeouts": self.timeouts.get(command, 0)
+            }
+            for command in sorted(self.commands.keys() | self.timeouts.keys())
+        }
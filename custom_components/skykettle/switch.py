@@ -1,13 +1,18 @@
 """SkyKettle."""
 import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
 
-from homeassistant.components.switch import SwitchDeviceClass, SwitchEntity
+from homeassistant.components.switch import (SwitchDeviceClass, SwitchEntity,
+                                             SwitchEntityDescription)
 from homeassistant.const import CONF_FRIENDLY_NAME
-from homeassistant.helpers.dispatcher import (async_dispatcher_connect,
-                                              dispatcher_send)
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import EntityCategory
 
 from .const import *
+from .kettle_state import KettleState
+from .loop_monitor import MonitoredEntity
 from .skykettle import SkyKettle
 
 _LOGGER = logging.getLogger(__name__)
@@ -19,137 +24,110 @@ SWITCH_LIGHT_SYNC = "light_sync"
 SWITCH_LIGHT_BOIL = "light_boil"
 
 
+@dataclass(frozen=True, kw_only=True)
+class SkySwitchEntityDescription(SwitchEntityDescription):
+    """Describes SkyKettle switch entity."""
+    name_suffix: str
+    value_fn: Callable[[KettleState], Any]
+    turn_fn: Callable[[Any, bool], Awaitable]
+    model_codes: tuple | None = None # None - all models
+
+
+SWITCH_TYPES = (
+    SkySwitchEntityDescription(
+        key=SWITCH_MAIN,
+        name_suffix="",
+        icon="mdi:cog",
+        device_class=SwitchDeviceClass.SWITCH,
+        value_fn=lambda state: state.target_mode != None,
+        turn_fn=lambda kettle, on: kettle.set_target_mode(SkyKettle.MODE_NAMES[SkyKettle.MODE_BOIL] if on else None)
+    ),
+    SkySwitchEntityDescription(
+        key=SWITCH_SOUND,
+        name_suffix="enable sound",
+        icon="mdi:volume-high",
+        device_class=SwitchDeviceClass.SWITCH,
+        entity_category=EntityCategory.CONFIG,
+        value_fn=lambda state: state.sound_enabled,
+        turn_fn=lambda kettle, on: kettle.set_sound(on),
+        model_codes=(SkyKettle.MODELS_4,)
+    ),
+    SkySwitchEntityDescription(
+        key=SWITCH_LIGHT_SYNC,
+        name_suffix="enable sync light",
+        icon="mdi:sync",
+        device_class=SwitchDeviceClass.SWITCH,
+        entity_category=EntityCategory.CONFIG,
+        value_fn=lambda state: state.light_switch_sync,
+        turn_fn=lambda kettle, on: kettle.set_light_switch(SkyKettle.LIGHT_SYNC, on),
+        model_codes=(SkyKettle.MODELS_4,)
+    ),
+    SkySwitchEntityDescription(
+        key=SWITCH_LIGHT_BOIL,
+        name_suffix="enable boil light",
+        icon="mdi:alarm-light",
+        device_class=SwitchDeviceClass.SWITCH,
+        entity_category=EntityCategory.CONFIG,
+        value_fn=lambda state: state.light_switch_boil,
+        turn_fn=lambda kettle, on: kettle.set_light_switch(SkyKettle.LIGHT_BOIL, on),
+        model_codes=(SkyKettle.MODELS_4,)
+    ),
+)
+
+
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the SkyKettle entry."""
     model_code = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION].model_code
     async_add_entities([
-        SkySwitch(hass, entry, SWITCH_MAIN)
+        SkySwitch(hass, entry, description)
+        for description in SWITCH_TYPES
+        if description.model_codes == None or model_code in description.model_codes
     ])
-    if model_code in [SkyKettle.MODELS_4]: # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
-        async_add_entities([
-            SkySwitch(hass, entry, SWITCH_SOUND),
-            SkySwitch(hass, entry, SWITCH_LIGHT_SYNC),
-            SkySwitch(hass, entry, SWITCH_LIGHT_BOIL),
-        ])
 
 
-class SkySwitch(SwitchEntity):
+class SkySwitch(MonitoredEntity, SwitchEntity):
     """Representation of a SkyKettle switch device."""
+    entity_description: SkySwitchEntityDescription
+    _attr_should_poll = False
+    _attr_assumed_state = False
 
-    def __init__(self, hass, entry, switch_type):
+    def __init__(self, hass, entry, description):
         """Initialize the switch device."""
         self.hass = hass
         self.entry = entry
-        self.switch_type = switch_type
+        self.entity_description = description
+        self.switch_type = description.key
+        self.kettle = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION]
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_name = (FRIENDLY_NAME + " " + entry.data.get(CONF_FRIENDLY_NAME, "") + " " + description.name_suffix).strip()
 
     async def async_added_to_hass(self):
         self.update()
-        self.async_on_remove(async_dispatcher_connect(self.hass, DISPATCHER_UPDATE, self.update))
+        self.async_on_remove(async_dispatcher_connect(self.hass, DISPATCHER_UPDATE.format(self.entry.entry_id), self.update))
 
     def update(self):
         self.schedule_update_ha_state()
 
-    @property
-    def kettle(self):
-        return self.hass.data[DOMAIN][self.entry.entry_id][DATA_CONNECTION]
-
-    @property
-    def unique_id(self):
-        return f"{self.entry.entry_id}_{self.switch_type}"
-
-    @property
-    def name(self):
-        """Name of the entity."""
-        if self.switch_type == SWITCH_MAIN:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip()
-        if self.switch_type == SWITCH_SOUND:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " enable sound"
-        if self.switch_type == SWITCH_LIGHT_SYNC:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " enable sync light"
-        if self.switch_type == SWITCH_LIGHT_BOIL:
-            return (FRIENDLY_NAME + " " + self.entry.data.get(CONF_FRIENDLY_NAME, "")).strip() + " enable boil light"
-
-    @property
-    def icon(self):
-        if self.switch_type == SWITCH_MAIN:
-            return "mdi:cog"
-        if self.switch_type == SWITCH_SOUND:
-            return "mdi:volume-high"
-        if self.switch_type == SWITCH_LIGHT_SYNC:
-            return "mdi:sync"
-        if self.switch_type == SWITCH_LIGHT_BOIL:
-            return "mdi:alarm-light"
-
-    @property
-    def device_class(self):
-        return SwitchDeviceClass.SWITCH
-
     @property
     def device_info(self):
-        return self.hass.data[DOMAIN][DATA_DEVICE_INFO]()
-
-    @property
-    def should_poll(self):
-        return False
-
-    @property
-    def assumed_state(self):
-        return False
-
-    @property
-    def available(self):        
-        if self.switch_type == SWITCH_MAIN:
-            return self.kettle.available
-        if self.switch_type == SWITCH_SOUND:
-            return self.kettle.available and self.kettle.sound_enabled != None
-        if self.switch_type == SWITCH_LIGHT_SYNC:
-            return self.kettle.available and self.kettle.light_switch_sync != None
-        if self.switch_type == SWITCH_LIGHT_BOIL:
-            return self.kettle.available and self.kettle.light_switch_boil != None
+        return self.hass.data[DOMAIN][self.entry.entry_id][DATA_DEVICE_INFO]
 
     @property
-    def entity_category(self):
-        if self.switch_type == SWITCH_MAIN:
-            return None
-        if self.switch_type == SWITCH_SOUND:
-            return EntityCategory.CONFIG
-        if self.switch_type == SWITCH_LIGHT_SYNC:
-            return EntityCategory.CONFIG
-        if self.switch_type == SWITCH_LIGHT_BOIL:
-            return EntityCategory.CONFIG
+    def available(self):
+        state = self.kettle.state
+        return state.available and self.entity_description.value_fn(state) != None
 
     @property
     def is_on(self):
         """If the switch is currently on or off."""
-        if self.switch_type == SWITCH_MAIN:
-            return self.kettle.target_mode != None
-        if self.switch_type == SWITCH_SOUND:
-            return self.kettle.sound_enabled
-        if self.switch_type == SWITCH_LIGHT_SYNC:
-            return self.kettle.light_switch_sync
-        if self.switch_type == SWITCH_LIGHT_BOIL:
-            return self.kettle.light_switch_boil
+        return self.entity_description.value_fn(self.kettle.state)
 
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
-        if self.switch_type == SWITCH_MAIN:
-            await self.kettle.set_target_mode(SkyKettle.MODE_NAMES[SkyKettle.MODE_BOIL])
-        if self.switch_type == SWITCH_SOUND:
-            await self.kettle.set_sound(True)
-        if self.switch_type == SWITCH_LIGHT_SYNC:
-            await self.kettle.set_light_switch(SkyKettle.LIGHT_SYNC, True)
-        if self.switch_type == SWITCH_LIGHT_BOIL:
-            await self.kettle.set_light_switch(SkyKettle.LIGHT_BOIL, True)
-        self.hass.async_add_executor_job(dispatcher_send, self.hass, DISPATCHER_UPDATE)
+        await self.entity_description.turn_fn(self.kettle, True)
+        self.dispatch_update()
 
     async def async_turn_off(self, **kwargs):
         """Turn the switch off."""
-        if self.switch_type == SWITCH_MAIN:
-            await self.kettle.set_target_mode(None)
-        if self.switch_type == SWITCH_SOUND:
-            await self.kettle.set_sound(False)
-        if self.switch_type == SWITCH_LIGHT_SYNC:
-            await self.kettle.set_light_switch(SkyKettle.LIGHT_SYNC, False)
-        if self.switch_type == SWITCH_LIGHT_BOIL:
-            await self.kettle.set_light_switch(SkyKettle.LIGHT_BOIL, False)
-        self.hass.async_add_executor_job(dispatcher_send, self.hass, DISPATCHER_UPDATE)
+        await self.entity_description.turn_fn(self.kettle, False)
+        self.dispatch_update()
@@ -4,13 +4,12 @@ import logging
 from homeassistant.components.water_heater import (WaterHeaterEntity,
                                                    WaterHeaterEntityFeature,
                                                    ATTR_OPERATION_MODE)
-from homeassistant.const import (ATTR_SW_VERSION, ATTR_TEMPERATURE,
-                                 CONF_FRIENDLY_NAME, CONF_SCAN_INTERVAL,
+from homeassistant.const import (ATTR_TEMPERATURE, CONF_SCAN_INTERVAL,
                                  STATE_OFF, UnitOfTemperature)
-from homeassistant.helpers.dispatcher import (async_dispatcher_connect,
-                                              dispatcher_send)
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import *
+from .loop_monitor import MonitoredEntity
 from .skykettle import SkyKettle
 
 _LOGGER = logging.getLogger(__name__)
@@ -21,80 +20,30 @@ async def async_setup_entry(hass, entry, async_add_entities, discovery_info=None
     async_add_entities([SkyWaterHeater(hass, entry)])
 
 
-class SkyWaterHeater(WaterHeaterEntity):
+class SkyWaterHeater(MonitoredEntity, WaterHeaterEntity):
     """Representation of a SkyKettle water_heater device."""
     _attr_has_entity_name = True
     _attr_name = None
     _attr_translation_key = "skykettle"
+    _attr_should_poll = False
+    _attr_assumed_state = False
+    _attr_supported_features = (
+        WaterHeaterEntityFeature.TARGET_TEMPERATURE
+        | WaterHeaterEntityFeature.OPERATION_MODE
+        | WaterHeaterEntityFeature.ON_OFF
+    )
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _attr_min_temp = ROOM_TEMP
+    _attr_max_temp = BOIL_TEMP
 
     def __init__(self, hass, entry):
         """Initialize the water_heater device."""
         self.hass = hass
         self.entry = entry
-
-    async def async_added_to_hass(self):
-        self.update()
-        self.async_on_remove(async_dispatcher_connect(self.hass, DISPATCHER_UPDATE, self.update))
-
-    def update(self):
-        self.schedule_update_ha_state()
-
-    @property
-    def kettle(self):
-        return self.hass.data[DOMAIN][self.entry.entry_id][DATA_CONNECTION]
-
-    @property
-    def unique_id(self):
-        return self.entry.entry_id + "_water_heater"
-
-    @property
-    def device_class(self):
-        return None
-
-    @property
-    def device_info(self):
-        return self.hass.data[DOMAIN][DATA_DEVICE_INFO]()
-
-    @property
-    def should_poll(self):
-        return False
-
-    @property
-    def assumed_state(self):
-        return False
-
-    @property
-    def available(self):
-        return self.kettle.available
-
-    @property
-    def entity_category(self):
-        return None
-
-    @property
-    def supported_features(self):
-        return (
-            WaterHeaterEntityFeature.TARGET_TEMPERATURE
-            | WaterHeaterEntityFeature.OPERATION_MODE
-            | WaterHeaterEntityFeature.ON_OFF
-        )
-
-    @property
-    def temperature_unit(self):
-        return UnitOfTemperature.CELSIUS
-
-    @property
-    def min_temp(self):
-        return ROOM_TEMP
-
-    @property
-    def max_temp(self):
-        return BOIL_TEMP
-
-    @property
-    def operation_list(self):
+        self.kettle = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION]
+        self._attr_unique_id = entry.entry_id + "_water_heater"
         if self.kettle.model_code in [SkyKettle.MODELS_4]: # RK-G2xxS, RK-M13xS, RK-M21xS, RK-M223S but not sure
-            return [
+            self._attr_operation_list = [
                 STATE_OFF,
                 SkyKettle.MODE_NAMES[SkyKettle.MODE_HEAT],
                 SkyKettle.MODE_NAMES[SkyKettle.MODE_BOIL],
@@ -103,53 +52,63 @@ class SkyWaterHeater(WaterHeaterEntity):
                 SkyKettle.MODE_NAMES[SkyKettle.MODE_GAME]
             ]
         else:
-            return [
+            self._attr_operation_list = [
                 STATE_OFF,
                 SkyKettle.MODE_NAMES[SkyKettle.MODE_HEAT],
                 SkyKettle.MODE_NAMES[SkyKettle.MODE_BOIL],
                 SkyKettle.MODE_NAMES[SkyKettle.MODE_BOIL_HEAT]
             ]
 
+    async def async_added_to_hass(self):
+        self.update()
+        self.async_on_remove(async_dispatcher_connect(self.hass, DISPATCHER_UPDATE.format(self.entry.entry_id), self.update))
+
+    def update(self):
+        self.schedule_update_ha_state()
+
+    @property
+    def device_info(self):
+        return self.hass.data[DOMAIN][self.entry.entry_id][DATA_DEVICE_INFO]
+
+    @property
+    def available(self):
+        return self.kettle.state.available
+
     @property
     def extra_state_attributes(self):
-        sw_version = self.kettle.sw_version
-        if sw_version:
-            major, minor = sw_version
-            sw_version = f"{major}.{minor}"
-            updates = {ATTR_SW_VERSION: sw_version}
-            self.hass.config_entries.async_update_entry(
-                self.entry, data={**self.entry.data, **updates}
-            )
+        state = self.kettle.state
         data = {
             "target_temp_step": 5,
-            "connected": self.kettle.connected,
-            "auth_ok": self.kettle.auth_ok,
-            "sw_version": sw_version,
-            "success_rate": self.kettle.success_rate,
-            "persistent_connection": self.kettle.persistent,
+            "stale": state.stale,
+            "connected": state.connected,
+            "auth_ok": state.auth_ok,
+            "sw_version": state.sw_version,
+            "success_rate": state.success_rate,
+            "polls_saved": state.polls_saved,
+            "persistent_connection": state.persistent,
             "poll_interval": self.entry.data.get(CONF_SCAN_INTERVAL, 0),
-            "ontime_seconds": self.kettle.ontime.total_seconds() if self.kettle.ontime else None,
-            "ontime_string": str(self.kettle.ontime),
-            "energy_wh": self.kettle.energy_wh,
-            "power_w": self.kettle.power_w,
-            "heater_on_count": self.kettle.heater_on_count,
-            "user_on_count": self.kettle.user_on_count,
-            "sound_enabled": self.kettle.sound_enabled,
-            "color_interval": self.kettle.color_interval,
-            "boil_time": self.kettle.boil_time,
-            "water_freshness_hours": self.kettle.water_freshness_hours,
-            "lamp_auto_off_hours": self.kettle.lamp_auto_off_hours,
-            "boil_light": self.kettle.light_switch_boil,
-            "sync_light": self.kettle.light_switch_sync,
-            "parental_control": self.kettle.parental_control,
-            "error_code": self.kettle.error_code,
+            "ontime_seconds": state.ontime_seconds,
+            "ontime_string": str(state.ontime),
+            "energy_wh": state.energy_wh,
+            "power_w": state.power_w,
+            "heater_on_count": state.heater_on_count,
+            "user_on_count": state.user_on_count,
+            "sound_enabled": state.sound_enabled,
+            "color_interval": state.color_interval,
+            "boil_time": state.boil_time,
+            "water_freshness_hours": state.water_freshness_hours,
+            "lamp_auto_off_hours": state.lamp_auto_off_hours,
+            "boil_light": state.light_switch_boil,
+            "sync_light": state.light_switch_sync,
+            "parental_control": state.parental_control,
+            "error_code": state.error_code,
         }
         return data
 
     @property
     def is_on(self):
         """If the switch is currently on or off."""
-        return self.kettle.target_mode != None
+        return self.kettle.state.target_mode != None
 
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
@@ -161,24 +120,24 @@ class SkyWaterHeater(WaterHeaterEntity):
 
     @property
     def current_temperature(self):
-        return self.kettle.current_temp
+        return self.kettle.state.current_temp
 
     @property
     def target_temperature(self):
-        return self.kettle.target_temp
+        return self.kettle.state.target_temp
 
     @property
     def current_operation(self):
-        return self.kettle.target_mode_str
+        return self.kettle.state.target_mode_str
 
     async def async_set_temperature(self, **kwargs):
         """Set new target temperatures."""
         target_temperature = kwargs.get(ATTR_TEMPERATURE)
         operation_mode = kwargs.get(ATTR_OPERATION_MODE)
         await self.kettle.set_target_temp(target_temperature, operation_mode)
-        self.hass.async_add_executor_job(dispatcher_send, self.hass, DISPATCHER_UPDATE)
+        self.dispatch_update()
 
     async def async_set_operation_mode(self, operation_mode):
         """Set new operation mode."""
         await self.kettle.set_target_mode(operation_mode)
-        self.hass.async_add_executor_job(dispatcher_send, self.hass, DISPATCHER_UPDATE)
+        self.dispatch_update()
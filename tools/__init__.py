@@ -0,0 +1 @@
+"""Development tools for the SkyKettle integration (benchmarks, simulators)."""
@@ -0,0 +1,85 @@
+"""Aggregates update phase timings written by the "trace spans" option.
+
+Prints count, mean, percentiles, maximum and errors of every phase, for all
+kettles together or per kettle, and the slowest update cycles with their
+phases, so it's easy to see why a poll took so long.
+
+Usage (from the repository root, no Home Assistant needed):
+    python -m tools.analyze_spans /config/skykettle_spans.jsonl [--by-kettle] [--slowest 5]
+"""
+import argparse
+import json
+from collections import defaultdict
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def load(path):
+    spans = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                pass # Partially written line
+    return spans
+
+
+def print_phases(spans):
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    for span in spans:
+        durations[span["phase"]].append(span["duration_ms"])
+        if span.get("error"): errors[span["phase"]] += 1
+    print(f"{'phase':<14}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'errors':>8}")
+    # Slowest phases first, whole cycle is the slowest one
+    for phase, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        print(f"{phase:<14}{len(values):>8}{sum(values) / len(values):>10.1f}{percentile(values, 50):>10.1f}"
+            f"{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}{max(values):>10.1f}{errors[phase]:>8}")
+
+
+def print_slowest(spans, n):
+    cycles = defaultdict(list)
+    for span in spans:
+        cycles[(span.get("mac"), span["cycle"])].append(span)
+    totals = [(span["duration_ms"], key) for key, phases in cycles.items() for span in phases if span["phase"] == "update"]
+    for total, (mac, cycle) in sorted(totals, reverse=True)[:n]:
+        phases = cycles[(mac, cycle)]
+        print(f"{mac} cycle {cycle}: {total:.1f} ms")
+        for span in phases:
+            if span["phase"] == "update": continue
+            error = f" ({span['error']})" if span.get("error") else ""
+            print(f"    {span['phase']:<14}{span['duration_ms']:>10.1f} ms{error}")
+
+
+def main(args):
+    spans = load(args.file)
+    if not spans:
+        print("No spans")
+        return
+    if args.by_kettle:
+        kettles = defaultdict(list)
+        for span in spans:
+            kettles[(span.get("mac"), span.get("model"))].append(span)
+        for (mac, model), kettle_spans in sorted(kettles.items(), key=lambda item: str(item[0])):
+            print(f"{model} ({mac})")
+            print_phases(kettle_spans)
+            print()
+    else:
+        print_phases(spans)
+    if args.slowest:
+        print()
+        print_slowest(spans, args.slowest)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", help="JSON lines file written by the integration")
+    parser.add_argument("--by-kettle", action="store_true", help="separate statistics for every kettle")
+    parser.add_argument("--slowest", type=int, default=5, help="number of the slowest update cycles to show")
+    main(parser.parse_args())
@@ -0,0 +1,73 @@
+"""Microbenchmark of entity properties which Home Assistant reads on every state write.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.bench_entities [--writes 2000]
+"""
+import argparse
+import asyncio
+import tempfile
+from datetime import timedelta
+from time import perf_counter
+from types import SimpleNamespace
+
+from homeassistant.const import CONF_FRIENDLY_NAME, CONF_MAC
+from homeassistant.core import HomeAssistant
+
+from custom_components.skykettle import light, number, sensor, switch, water_heater
+from custom_components.skykettle.const import DATA_CONNECTION, DOMAIN
+from custom_components.skykettle.kettle_state import KettleState
+from custom_components.skykettle.skykettle import SkyKettle
+
+# What Entity._async_calculate_state() and friends read on a state write
+STATE_WRITE_PROPERTIES = ["available", "state", "capability_attributes", "state_attributes",
+    "extra_state_attributes", "unit_of_measurement", "name", "icon", "device_class",
+    "supported_features", "assumed_state", "should_poll"]
+
+
+def fake_state(**kwargs):
+    """State of a heating kettle, kwargs override values."""
+    colors = {lt: ((255, 0, 0), (0, 255, 0), (0, 0, 255)) for lt in [SkyKettle.LIGHT_BOIL, SkyKettle.LIGHT_LAMP]}
+    return KettleState(**{**dict(available=True, connected=True, auth_ok=True, persistent=True, success_rate=100, polls_saved=0,
+        current_temp=40, current_mode=SkyKettle.MODE_HEAT, target_temp=60, target_mode=SkyKettle.MODE_HEAT,
+        target_mode_str="heat", sound_enabled=True, color_interval=60, boil_time=0, parental_control=False,
+        lamp_auto_off_hours=6, light_switch_boil=True, light_switch_sync=False, water_freshness_hours=3,
+        ontime=timedelta(hours=5), ontime_seconds=18000, energy_wh=12345, energy_kwh=12.35, power_w=0,
+        heater_on_count=100, user_on_count=50, colors=colors,
+        brightness={lt: 255 for lt in colors}, temperatures={lt: (40, 60, 80) for lt in colors}), **kwargs})
+
+
+def create_entities(hass, n):
+    entry = SimpleNamespace(entry_id=f"entry{n}", data={CONF_MAC: f"AA:BB:CC:DD:EE:{n:02X}", CONF_FRIENDLY_NAME: "RK-G211S"})
+    kettle = SimpleNamespace(model_code=SkyKettle.MODELS_4, persistent=True, state=fake_state())
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {DATA_CONNECTION: kettle}
+    entities = [water_heater.SkyWaterHeater(hass, entry)]
+    entities += [sensor.SkySensor(hass, entry, d) for d in sensor.SENSOR_TYPES]
+    entities += [switch.SkySwitch(hass, entry, d) for d in switch.SWITCH_TYPES]
+    entities += [number.SkyNumber(hass, entry, d) for d in number.NUMBER_TYPES]
+    entities += [light.KettleLight(hass, entry, d) for d in light.LIGHT_TYPES]
+    return entities
+
+
+def write_state(entity):
+    return {name: getattr(entity, name) for name in STATE_WRITE_PROPERTIES}
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        entities = create_entities(hass, 0)
+        for entity in entities: write_state(entity) # Warm up
+        start = perf_counter()
+        for _ in range(args.writes):
+            for entity in entities:
+                write_state(entity)
+        elapsed = perf_counter() - start
+    per_entity = elapsed / args.writes / len(entities) * 1e6
+    print(f"{len(entities)} entities per kettle, {args.writes} state writes each")
+    print(f"{per_entity:.2f} us per entity state write, {per_entity * len(entities):.1f} us per kettle update")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000, help="state writes per entity")
+    asyncio.run(main(parser.parse_args()))
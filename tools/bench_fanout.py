@@ -0,0 +1,120 @@
+"""Entity fan-out benchmark for many kettles on one Home Assistant instance.
+
+Sets up N kettles with fake connections and the entities of all five
+platforms, then every kettle fires its update signal once per scan interval
+(staggered, like real polls) with a changed state. Reports state writes per
+second, event loop time per update signal and memory per entity.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.bench_fanout [--kettles 10 50 100] [--seconds 10] [--interval 5]
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import tracemalloc
+from datetime import timedelta
+from statistics import mean
+from time import perf_counter
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from homeassistant.const import CONF_FRIENDLY_NAME, CONF_MAC
+from homeassistant.core import HomeAssistant, StateMachine
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+from custom_components.skykettle import light, number, sensor, switch, water_heater
+from custom_components.skykettle.const import (DATA_CONNECTION, DATA_DEVICE_INFO,
+                                               DISPATCHER_UPDATE, DOMAIN)
+from custom_components.skykettle.loop_monitor import LoopMonitor
+from custom_components.skykettle.skykettle import SkyKettle
+
+from .bench_entities import fake_state
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def create_entities(hass, n):
+    """Entities of all platforms for one RK-G2xxS kettle, grouped by domain."""
+    entry = SimpleNamespace(entry_id=f"entry{n}", data={CONF_MAC: f"AA:BB:CC:DD:{n // 256:02X}:{n % 256:02X}", CONF_FRIENDLY_NAME: "RK-G211S"})
+    kettle = SimpleNamespace(model_code=SkyKettle.MODELS_4, persistent=True, state=fake_state(), monitor=LoopMonitor())
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {DATA_CONNECTION: kettle, DATA_DEVICE_INFO: None}
+    entities = {
+        "water_heater": [water_heater.SkyWaterHeater(hass, entry)],
+        "sensor": [sensor.SkySensor(hass, entry, d) for d in sensor.SENSOR_TYPES],
+        "switch": [switch.SkySwitch(hass, entry, d) for d in switch.SWITCH_TYPES],
+        "number": [number.SkyNumber(hass, entry, d) for d in number.NUMBER_TYPES],
+        "light": [light.KettleLight(hass, entry, d) for d in light.LIGHT_TYPES],
+    }
+    for domain_entities in entities.values():
+        for entity in domain_entities:
+            entity._attr_unique_id = None # No entity registry here
+    return kettle, entities
+
+
+async def run(args, kettles_count):
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        platforms = {
+            domain: EntityPlatform(hass=hass, logger=_LOGGER, domain=domain, platform_name=DOMAIN,
+                platform=None, scan_interval=timedelta(seconds=30), entity_namespace=None)
+            for domain in ["water_heater", "sensor", "switch", "number", "light"]
+        }
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kettles = []
+        entities_count = 0
+        for n in range(kettles_count):
+            kettle, entities = create_entities(hass, n)
+            kettles.append(kettle)
+            for domain, domain_entities in entities.items():
+                await platforms[domain].async_add_entities(domain_entities)
+                entities_count += len(domain_entities)
+        await hass.async_block_till_done()
+        memory = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        # Count state machine writes, instance attributes of StateMachine are read-only,
+        # entities of newer versions write with async_set_internal()
+        writes = 0
+        method = "async_set_internal" if hasattr(StateMachine, "async_set_internal") else "async_set"
+        original = getattr(StateMachine, method)
+        def counting_set(self, *args, **kwargs):
+            nonlocal writes
+            writes += 1
+            return original(self, *args, **kwargs)
+
+        # Every kettle polls once per interval, polls are spread evenly
+        step = args.interval / kettles_count
+        signals = int(args.seconds / step)
+        times = []
+        with patch.object(StateMachine, method, counting_set):
+            start = perf_counter()
+            for i in range(signals):
+                kettle = kettles[i % kettles_count]
+                temp = 40 + i % 50
+                kettle.state = fake_state(current_temp=temp)
+                signal_start = perf_counter()
+                async_dispatcher_send(hass, DISPATCHER_UPDATE.format(f"entry{i % kettles_count}"))
+                await hass.async_block_till_done() # Let the scheduled state writes run
+                times.append(perf_counter() - signal_start)
+                await asyncio.sleep(max(0, start + (i + 1) * step - perf_counter()))
+            elapsed = perf_counter() - start
+            await hass.async_block_till_done()
+    print(f"{kettles_count:>5} kettles {entities_count:>6} entities {signals:>6} signals "
+        f"{writes / elapsed:>10.0f} writes/s {mean(times) * 1000:>9.3f} ms/signal (max {max(times) * 1000:.3f}) "
+        f"{memory / entities_count / 1024:>7.1f} KiB/entity")
+
+
+async def main(args):
+    for kettles_count in args.kettles:
+        await run(args, kettles_count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kettles", type=int, nargs="+", default=[10, 50, 100], help="numbers of kettles")
+    parser.add_argument("--seconds", type=float, default=10, help="duration of every run")
+    parser.add_argument("--interval", type=float, default=5, help="poll interval of every kettle in seconds")
+    asyncio.run(main(parser.parse_args()))
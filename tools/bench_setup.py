@@ -0,0 +1,90 @@
+"""Startup benchmark, measures async_setup_entry() wall time per kettle.
+
+Platform forwarding is replaced with direct import and setup of the platform
+modules, Bluetooth callbacks and polling are not started.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.bench_setup [--entries 20] [--models RK-G211S RK-M171S RK-G200]
+"""
+import argparse
+import asyncio
+import importlib
+import sys
+import tempfile
+from statistics import mean
+from time import perf_counter
+from unittest.mock import patch
+
+from homeassistant.components import bluetooth
+from homeassistant.const import (CONF_FRIENDLY_NAME, CONF_MAC, CONF_PASSWORD,
+                                 CONF_SCAN_INTERVAL)
+from homeassistant.core import HomeAssistant
+
+import custom_components.skykettle as skykettle
+from custom_components.skykettle.const import CONF_PERSISTENT_CONNECTION
+
+PACKAGE = "custom_components.skykettle"
+
+
+class FakeEntry():
+    def __init__(self, n, model):
+        self.entry_id = f"entry{n}"
+        self.data = {
+            CONF_MAC: f"AA:BB:CC:DD:{n // 256:02X}:{n % 256:02X}",
+            CONF_PASSWORD: list(range(8)),
+            CONF_FRIENDLY_NAME: model,
+            CONF_PERSISTENT_CONNECTION: True,
+            CONF_SCAN_INTERVAL: 5
+        }
+
+    def async_on_unload(self, func):
+        pass
+
+    def add_update_listener(self, listener):
+        return lambda: None
+
+
+class FakeConfigEntries():
+    def __init__(self, hass):
+        self.hass = hass
+        self.entities = 0
+
+    async def async_forward_entry_setups(self, entry, platforms):
+        for platform in platforms:
+            module = importlib.import_module(f"{PACKAGE}.{platform.value}")
+            await module.async_setup_entry(self.hass, entry, self.add_entities)
+
+    def add_entities(self, entities):
+        self.entities += len(entities)
+
+
+async def main(args):
+    results = {}
+    with tempfile.TemporaryDirectory() as config_dir, \
+            patch.object(bluetooth, "async_register_callback", return_value=lambda: None), \
+            patch.object(skykettle.ev, "async_call_later", return_value=lambda: None):
+        n = 0
+        for model in args.models:
+            # Cold start: platform modules are not imported yet
+            for name in [m for m in sys.modules if m.startswith(PACKAGE + ".") and m.rsplit(".", 1)[1] in
+                         [p.value for p in skykettle.PLATFORMS]]:
+                del sys.modules[name]
+            hass = HomeAssistant(config_dir)
+            hass.config_entries = FakeConfigEntries(hass)
+            times = []
+            for _ in range(args.entries):
+                entry = FakeEntry(n, model)
+                n += 1
+                start = perf_counter()
+                await skykettle.async_setup_entry(hass, entry)
+                times.append(perf_counter() - start)
+            results[model] = times
+            print(f"{model}: {hass.config_entries.entities // args.entries} entities, "
+                  f"first {times[0] * 1000:.2f} ms, mean {mean(times) * 1000:.3f} ms per kettle")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20, help="config entries per model")
+    parser.add_argument("--models", nargs="+", default=["RK-G211S", "RK-M171S", "RK-G200"], help="kettle models")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,48 @@
+"""Color streaming benchmark against the simulated kettle.
+
+Requests colors at the given rate for a while, like music or notification
+driven lights do, and reports frames per second reached by the streaming
+sender, dropped (replaced) colors and the lag of the last color.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.bench_stream [--rate 30] [--seconds 5] [--latency 0.03]
+"""
+import argparse
+import asyncio
+from time import perf_counter
+
+from custom_components.skykettle.skykettle import SkyKettle
+
+from .simulator import SimulatedKettle, create_connection
+
+
+async def main(args):
+    clients = []
+    connection = create_connection(kettle=SimulatedKettle(args.model), clients=clients, latency=args.latency, jitter=args.jitter)
+    await connection.set_target_mode(SkyKettle.MODE_NAMES[SkyKettle.MODE_GAME])
+    writes = sum(client.writes for client in clients)
+    start = perf_counter()
+    n = 0
+    while perf_counter() - start < args.seconds:
+        connection.stream_color(n % 256, 255 - n % 256, 0)
+        n += 1
+        await asyncio.sleep(max(0, start + n / args.rate - perf_counter()))
+    # Wait for the last color
+    last_request = perf_counter()
+    while connection.streaming:
+        await asyncio.sleep(0.001)
+    lag = perf_counter() - last_request
+    frames = sum(client.writes for client in clients) - writes
+    print(f"requested {n} colors ({args.rate}/s), sent {frames} frames, dropped {connection.stream_dropped}, "
+        f"{connection.stream_fps} fps, last color lag {lag * 1000:.0f} ms")
+    await connection.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="RK-G211S", help="kettle model")
+    parser.add_argument("--rate", type=float, default=30, help="requested colors per second")
+    parser.add_argument("--seconds", type=float, default=5, help="duration")
+    parser.add_argument("--latency", type=float, default=0.03, help="simulated response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="simulated response latency jitter in seconds")
+    asyncio.run(main(parser.parse_args()))
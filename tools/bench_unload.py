@@ -0,0 +1,46 @@
+"""Measures how long KettleConnection.stop() takes while an update is in progress.
+
+The kettle never answers, so the update hangs in the receive timeout, like
+with a kettle which went out of range. Exits with code 1 if stop() takes
+longer than KettleConnection.STOP_TIMEOUT.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.bench_unload [--delay 0.3]
+"""
+import argparse
+import asyncio
+import sys
+from time import perf_counter
+
+from custom_components.skykettle.kettle_connection import KettleConnection
+
+
+class SilentClient():
+    """Connected BLE client stand-in which never receives anything."""
+    is_connected = True
+
+    async def write_gatt_char(self, uuid, data):
+        pass
+
+    async def disconnect(self):
+        self.is_connected = False
+
+
+async def main(args):
+    kettle = KettleConnection(mac="AA:BB:CC:DD:EE:FF", key=list(range(8)), model="RK-G211S")
+    kettle._client = SilentClient()
+    kettle._auth_ok = True
+    update = asyncio.get_running_loop().create_task(kettle.update())
+    await asyncio.sleep(args.delay)
+    start = perf_counter()
+    await kettle.stop()
+    elapsed = perf_counter() - start
+    result = await update
+    print(f"stop() took {elapsed * 1000:.1f} ms, update() returned {result}")
+    return elapsed <= KettleConnection.STOP_TIMEOUT
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.3, help="seconds between update start and stop()")
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
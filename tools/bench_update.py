@@ -0,0 +1,129 @@
+"""End-to-end benchmark of KettleConnection.update() against the simulated kettle.
+
+Every scenario runs on a fresh connection several times and reports median
+wall time, BLE round trips, bytes sent and received and event loop wakeups.
+Results can be saved as JSON and compared with a previous run.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.bench_update [--runs 5] [--latency 0.03] [--output new.json] [--compare old.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+from datetime import datetime
+from statistics import mean, median
+from time import perf_counter
+
+from custom_components.skykettle.skykettle import SkyKettle
+
+from .simulator import SimulatedKettle, create_connection
+
+
+class CountingEventLoop(asyncio.SelectorEventLoop):
+    """Event loop which counts its iterations (wakeups)."""
+    wakeups = 0
+
+    def _run_once(self):
+        self.wakeups += 1
+        super()._run_once()
+
+
+async def prepare_connected(connection):
+    """Connect and read everything, so the next update is a regular poll."""
+    await connection.update()
+
+
+# name: (persistent, prepare, action)
+SCENARIOS = {
+    "cold_connect": (True, None, lambda connection: connection.update()),
+    "persistent_poll": (True, prepare_connected, lambda connection: connection.update()),
+    "non_persistent_poll": (False, prepare_connected, lambda connection: connection.update()),
+    "stats_cycle": (True, prepare_connected, lambda connection: connection.update(force_stats=True)),
+    "target_change": (True, prepare_connected,
+        lambda connection: connection.set_target_temp(70, SkyKettle.MODE_NAMES[SkyKettle.MODE_HEAT])),
+    "boil_time_change": (True, prepare_connected, lambda connection: connection.set_boil_time(3)),
+}
+
+
+async def run_scenario(args, name, seed):
+    persistent, prepare, action = SCENARIOS[name]
+    clients = []
+    kettle = SimulatedKettle(args.model)
+    connection = create_connection(kettle=kettle, persistent=persistent, clients=clients,
+        latency=args.latency, jitter=args.jitter, rng=random.Random(seed))
+    if prepare: await prepare(connection)
+    loop = asyncio.get_running_loop()
+    writes = sum(client.writes for client in clients)
+    sent = sum(client.bytes_sent for client in clients)
+    received = sum(client.bytes_received for client in clients)
+    wakeups = loop.wakeups
+    start = perf_counter()
+    await action(connection)
+    elapsed = perf_counter() - start
+    result = {
+        "wall_ms": elapsed * 1000,
+        "round_trips": sum(client.writes for client in clients) - writes,
+        "bytes_sent": sum(client.bytes_sent for client in clients) - sent,
+        "bytes_received": sum(client.bytes_received for client in clients) - received,
+        "wakeups": loop.wakeups - wakeups,
+        "success_rate": connection.success_rate
+    }
+    await connection.stop()
+    return result
+
+
+async def main(args):
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        runs = [await run_scenario(args, name, seed) for seed in range(args.runs)]
+        results[name] = {
+            "wall_ms": round(median(run["wall_ms"] for run in runs), 2),
+            **{key: mean(run[key] for run in runs) for key in ["round_trips", "bytes_sent", "bytes_received", "wakeups"]},
+            "failed": sum(1 for run in runs if run["success_rate"] < 100)
+        }
+    return results
+
+
+def print_results(results, previous=None):
+    print(f"{'scenario':<22}{'wall ms':>10}{'trips':>8}{'sent':>8}{'recv':>8}{'wakeups':>9}{'failed':>8}")
+    for name, result in results.items():
+        line = (f"{name:<22}{result['wall_ms']:>10.1f}{result['round_trips']:>8.1f}{result['bytes_sent']:>8.0f}"
+            f"{result['bytes_received']:>8.0f}{result['wakeups']:>9.0f}{result['failed']:>8}")
+        old = (previous or {}).get(name, None)
+        if old:
+            line += f"   ({result['wall_ms'] - old['wall_ms']:+.1f} ms, {result['round_trips'] - old['round_trips']:+.1f} trips)"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="RK-G211S", help="kettle model")
+    parser.add_argument("--runs", type=int, default=5, help="runs of every scenario")
+    parser.add_argument("--latency", type=float, default=0.03, help="simulated response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="simulated response latency jitter in seconds")
+    parser.add_argument("--output", help="save results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with")
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run: {', '.join(SCENARIOS)}")
+    args = parser.parse_args()
+    loop = CountingEventLoop()
+    try:
+        results = loop.run_until_complete(main(args))
+    finally:
+        loop.close()
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+    print_results(results, previous)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "args": vars(args),
+                "results": results
+            }, f, indent=2)
@@ -0,0 +1,149 @@
+"""Checks that several kettles set up at once don't mix their entities.
+
+Sets up two config entries with real entity platforms, Bluetooth callbacks
+and polling are not started. Checks that every entity has the device info
+of its own kettle, the update signal of one kettle writes states of its own
+entities only, a learned firmware version changes the device info of that
+kettle only and unloading one kettle keeps the other one working. Exits with
+code 1 if any check fails.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.check_entries [--model RK-G211S]
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import sys
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.components import bluetooth
+from homeassistant.const import ATTR_SW_VERSION, CONF_MAC
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+import custom_components.skykettle as skykettle
+from custom_components.skykettle.const import (DATA_CONNECTION, DATA_DEVICE_INFO,
+                                               DISPATCHER_UPDATE, DOMAIN)
+
+from .bench_setup import PACKAGE, FakeEntry
+from .checks import Checker, recording_state_writes
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FakeConfigEntries():
+    """Adds entities of every entry to its own entity platforms."""
+
+    def __init__(self, hass):
+        self.hass = hass
+        self.entities = {} # entry_id: [entities]
+        self.platforms = {} # entry_id: [EntityPlatform]
+
+    async def async_forward_entry_setups(self, entry, platforms):
+        self.entities[entry.entry_id] = []
+        self.platforms[entry.entry_id] = []
+        for platform in platforms:
+            module = importlib.import_module(f"{PACKAGE}.{platform.value}")
+            entities = []
+            await module.async_setup_entry(self.hass, entry, entities.extend)
+            for entity in entities:
+                entity._attr_unique_id = None # No entity registry here
+            entity_platform = EntityPlatform(hass=self.hass, logger=_LOGGER, domain=platform.value, platform_name=DOMAIN,
+                platform=None, scan_interval=timedelta(seconds=30), entity_namespace=None)
+            await entity_platform.async_add_entities(entities)
+            self.entities[entry.entry_id] += entities
+            self.platforms[entry.entry_id].append(entity_platform)
+
+    async def async_unload_platforms(self, entry, platforms):
+        for entity_platform in self.platforms.pop(entry.entry_id):
+            await entity_platform.async_reset()
+        return True
+
+    def async_update_entry(self, entry, data):
+        entry.data = data
+
+
+async def written_by(hass, signal):
+    """Entity IDs which states are written after the signal."""
+    with recording_state_writes() as written:
+        signal()
+        await hass.async_block_till_done()
+    return written
+
+
+async def main(args):
+    checker = Checker()
+    with tempfile.TemporaryDirectory() as config_dir, \
+            patch.object(bluetooth, "async_register_callback", return_value=lambda: None), \
+            patch.object(skykettle.ev, "async_call_later", return_value=lambda: None):
+        hass = HomeAssistant(config_dir)
+        hass.config_entries = FakeConfigEntries(hass)
+        await dr.async_load(hass)
+        entries = [FakeEntry(n, args.model) for n in range(2)]
+        for entry in entries:
+            await skykettle.async_setup_entry(hass, entry)
+        await hass.async_block_till_done()
+        a, b = entries
+        entity_ids = {entry.entry_id: {entity.entity_id for entity in hass.config_entries.entities[entry.entry_id]} for entry in entries}
+
+        errors = []
+        if entity_ids[a.entry_id] & entity_ids[b.entry_id]:
+            errors.append(f"shared entities: {entity_ids[a.entry_id] & entity_ids[b.entry_id]}")
+        for entry in entries:
+            kettle = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION]
+            if kettle.mac != entry.data[CONF_MAC]:
+                errors.append(f"{entry.entry_id} has the connection of {kettle.mac}")
+        checker.check("separate entities and connections", errors)
+
+        errors = []
+        for entry in entries:
+            for entity in hass.config_entries.entities[entry.entry_id]:
+                if entity.device_info["identifiers"] != {(DOMAIN, entry.data[CONF_MAC])}:
+                    errors.append(f"{entity.entity_id} has device {entity.device_info['identifiers']}")
+        checker.check("device info of the own kettle", errors)
+
+        errors = []
+        for entry in entries:
+            written = await written_by(hass, lambda: async_dispatcher_send(hass, DISPATCHER_UPDATE.format(entry.entry_id)))
+            if written != entity_ids[entry.entry_id]:
+                errors.append(f"update of {entry.entry_id} wrote {sorted(written)}")
+            # State pushed by the kettle itself
+            kettle = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION]
+            written = await written_by(hass, kettle._notify_update)
+            if written != entity_ids[entry.entry_id]:
+                errors.append(f"pushed state of {entry.entry_id} wrote {sorted(written)}")
+        checker.check("update signals reach the own entities only", errors)
+
+        errors = []
+        info_b = hass.data[DOMAIN][b.entry_id][DATA_DEVICE_INFO]
+        hass.config_entries.async_update_entry(a, data={**a.data, ATTR_SW_VERSION: "1.2"})
+        await skykettle.entry_update_listener(hass, a)
+        if hass.data[DOMAIN][a.entry_id][DATA_DEVICE_INFO]["sw_version"] != "1.2":
+            errors.append("device info of the updated entry is not changed")
+        if hass.data[DOMAIN][b.entry_id][DATA_DEVICE_INFO] is not info_b:
+            errors.append("device info of the other entry is rebuilt")
+        checker.check("firmware version changes the own device only", errors)
+
+        errors = []
+        await skykettle.async_unload_entry(hass, a)
+        await hass.async_block_till_done()
+        if a.entry_id in hass.data[DOMAIN] or b.entry_id not in hass.data[DOMAIN]:
+            errors.append(f"entries left: {list(hass.data[DOMAIN])}")
+        written = await written_by(hass, lambda: async_dispatcher_send(hass, DISPATCHER_UPDATE.format(b.entry_id)))
+        if written != entity_ids[b.entry_id]:
+            errors.append(f"update of {b.entry_id} wrote {sorted(written)}")
+        checker.check("unloading one kettle keeps the other one", errors)
+
+        await skykettle.async_unload_entry(hass, b)
+    return checker.ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="RK-G211S", help="kettle model of both entries")
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
@@ -0,0 +1,83 @@
+"""Checks KettleConnection.apply_profile() results on the simulated kettle.
+
+Every case applies a starting profile, then the checked one, and compares
+the simulated kettle state with the expected values. Applying the same
+profile again must not write anything. Exits with code 1 if any case fails.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.check_profiles [--verbose]
+"""
+import argparse
+import asyncio
+import sys
+
+from custom_components.skykettle.skykettle import SkyKettle
+
+from .checks import Checker, sent_writes, simulated_connection
+from .simulator import SimulatedKettle
+
+HEAT = SkyKettle.MODE_NAMES[SkyKettle.MODE_HEAT]
+BOIL = SkyKettle.MODE_NAMES[SkyKettle.MODE_BOIL]
+LAMP = SkyKettle.MODE_NAMES[SkyKettle.MODE_LAMP]
+
+# name: (starting profile, profile, expected SimulatedKettle attributes)
+CASES = {
+    "heat from off": ({}, dict(operation_mode=HEAT, target_temp=60),
+        dict(is_on=True, mode=SkyKettle.MODE_HEAT, target_temp=60)),
+    "temperature only from off": ({}, dict(target_temp=70),
+        dict(is_on=True, mode=SkyKettle.MODE_HEAT, target_temp=70)),
+    "temperature change": (dict(operation_mode=HEAT, target_temp=60), dict(target_temp=80),
+        dict(is_on=True, mode=SkyKettle.MODE_HEAT, target_temp=80)),
+    "boil from heat": (dict(operation_mode=HEAT, target_temp=60), dict(operation_mode=BOIL),
+        dict(is_on=True, mode=SkyKettle.MODE_BOIL)),
+    "off": (dict(operation_mode=HEAT, target_temp=60), dict(operation_mode="off"),
+        dict(is_on=False)),
+    "off with temperature": (dict(operation_mode=HEAT, target_temp=60), dict(operation_mode="off", target_temp=80),
+        dict(is_on=False)),
+    "off with temperature from off": ({}, dict(operation_mode="off", target_temp=80),
+        dict(is_on=False)),
+    "lamp with temperature": ({}, dict(operation_mode=LAMP, target_temp=60),
+        dict(is_on=True, mode=SkyKettle.MODE_LAMP, target_temp=85)),
+    "lamp with temperature from lamp": (dict(operation_mode=LAMP), dict(operation_mode=LAMP, target_temp=60),
+        dict(is_on=True, mode=SkyKettle.MODE_LAMP, target_temp=85)),
+    "settings keep the mode": (dict(operation_mode=HEAT, target_temp=60),
+        dict(sound=False, light_switches={SkyKettle.LIGHT_BOIL: False}, color_interval=60, lamp_auto_off_hours=3),
+        dict(is_on=True, mode=SkyKettle.MODE_HEAT, target_temp=60, sound_enabled=False, color_interval=60, lamp_auto_off_hours=3)),
+    "boil time": ({}, dict(boil_time=2),
+        dict(is_on=False, boil_time=2)),
+}
+
+
+async def check(name):
+    """Errors of the case."""
+    start, profile, expected = CASES[name]
+    clients = []
+    kettle = SimulatedKettle("RK-G211S")
+    errors = []
+    async with simulated_connection(kettle=kettle, clients=clients, force_stats=True) as connection:
+        if start and not await connection.apply_profile(**start):
+            errors.append("can't apply the starting profile")
+        if not await connection.apply_profile(**profile):
+            errors.append("can't apply the profile")
+        kettle.advance()
+        for attr, value in expected.items():
+            if getattr(kettle, attr) != value:
+                errors.append(f"{attr} is {getattr(kettle, attr)}, expected {value}")
+        writes = sent_writes(clients)
+        await connection.apply_profile(**profile)
+        if sent_writes(clients) != writes:
+            errors.append("the same profile is written again")
+    return errors
+
+
+async def main(args):
+    checker = Checker()
+    for name, (_, profile, _) in CASES.items():
+        checker.check(name, await check(name), [str(profile)] if args.verbose else [])
+    return checker.ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verbose", action="store_true", help="print applied profiles")
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
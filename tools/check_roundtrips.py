@@ -0,0 +1,65 @@
+"""Checks BLE round trips of every user action against declared budgets.
+
+Every public KettleConnection action runs on a connected simulated kettle
+after a regular poll. The exact command sequence it sends is recorded and
+compared with the budget. Exits with code 1 if any action needs more
+round trips than its budget, so airtime regressions are caught before a
+release. Lower the budget when an action gets cheaper.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.check_roundtrips [--verbose]
+"""
+import argparse
+import asyncio
+import sys
+from time import time
+
+from custom_components.skykettle.kettle_connection import COMMAND_NAMES
+from custom_components.skykettle.skykettle import SkyKettle
+
+from .checks import Checker, sent_commands, simulated_connection
+
+# name: (action, round trips budget)
+ACTIONS = {
+    "set_target_temp": (lambda kettle: kettle.set_target_temp(70, SkyKettle.MODE_NAMES[SkyKettle.MODE_HEAT]), 4),
+    "set_target_mode": (lambda kettle: kettle.set_target_mode(SkyKettle.MODE_NAMES[SkyKettle.MODE_BOIL]), 4),
+    "set_sound": (lambda kettle: kettle.set_sound(False), 3),
+    # Forces the stats block to read switches back
+    "set_light_switch": (lambda kettle: kettle.set_light_switch(SkyKettle.LIGHT_BOIL, False), 11),
+    "set_color": (lambda kettle: kettle.set_color(SkyKettle.LIGHT_LAMP, 0, (255, 0, 0)), 3),
+    "set_brightness": (lambda kettle: kettle.set_brightness(SkyKettle.LIGHT_LAMP, 128), 3),
+    "set_temperature": (lambda kettle: kettle.set_temperature(SkyKettle.LIGHT_BOIL, 1, 60), 3),
+    "set_lamp_color_interval": (lambda kettle: kettle.set_lamp_color_interval(60), 3),
+    "set_lamp_auto_off_hours": (lambda kettle: kettle.set_lamp_auto_off_hours(3), 2),
+    "set_boil_time": (lambda kettle: kettle.set_boil_time(3), 4),
+    "impulse_color": (lambda kettle: kettle.impulse_color(255, 0, 0, 255), 2),
+    # Reads the schedule back to learn the record ID
+    "add_schedule_record": (lambda kettle: kettle.add_schedule_record(time() + 3600, SkyKettle.MODE_BOIL), 6),
+}
+
+
+async def record(name):
+    """Command names sent by the action."""
+    action, _ = ACTIONS[name]
+    clients = []
+    async with simulated_connection(clients=clients) as connection:
+        sent = len(sent_commands(clients))
+        await action(connection)
+        commands = sent_commands(clients)[sent:]
+    return [COMMAND_NAMES.get(command, f"{command:02x}") for command in commands]
+
+
+async def main(args):
+    checker = Checker()
+    for name, (_, budget) in ACTIONS.items():
+        commands = await record(name)
+        errors = [f"over the budget: {', '.join(commands)}"] if len(commands) > budget else []
+        checker.check(f"{name:<26}{len(commands):>3} / {budget}", errors,
+            [", ".join(commands)] if args.verbose and not errors else [])
+    return checker.ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verbose", action="store_true", help="print command sequences of all actions")
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
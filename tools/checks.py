@@ -0,0 +1,61 @@
+"""Shared setup of the check_* developer tools, not a tool itself.
+
+Checker collects and prints check results, simulated_connection() gives a
+polled connection to a simulated kettle and recording_state_writes() records
+state machine writes of Home Assistant entities.
+"""
+from contextlib import asynccontextmanager, contextmanager
+from unittest.mock import patch
+
+from .simulator import SimulatedKettle, create_connection
+
+
+class Checker():
+    """Prints every check result, ok is False after any failed one."""
+
+    def __init__(self):
+        self.ok = True
+
+    def check(self, name, errors, details=[]):
+        """Details are printed with the errors or alone if the check passed."""
+        if errors: self.ok = False
+        print(f"{'FAIL' if errors else 'ok  '} {name}")
+        for line in [*errors, *details]:
+            print(f"     {line}")
+
+
+@asynccontextmanager
+async def simulated_connection(kettle=None, clients=None, force_stats=False):
+    """Connection to a simulated kettle with fast answers after the first poll, stopped on exit."""
+    connection = create_connection(kettle=kettle or SimulatedKettle("RK-G211S"), clients=clients, latency=0.001, jitter=0)
+    await connection.update(force_stats=force_stats)
+    try:
+        yield connection
+    finally:
+        await connection.stop()
+
+
+def sent_commands(clients):
+    """Command codes sent by all simulated clients in order."""
+    return [command for client in clients for command in client.commands]
+
+
+def sent_writes(clients):
+    """Number of frames written by all simulated clients."""
+    return sum(client.writes for client in clients)
+
+
+@contextmanager
+def recording_state_writes():
+    """Set of entity IDs which states are written inside the block, Home Assistant must be installed."""
+    from homeassistant.core import StateMachine
+    # Instance attributes of StateMachine are read-only,
+    # entities of newer versions write with async_set_internal()
+    method = "async_set_internal" if hasattr(StateMachine, "async_set_internal") else "async_set"
+    original = getattr(StateMachine, method)
+    written = set()
+    def recording_set(self, entity_id, *args, **kwargs):
+        written.add(entity_id)
+        return original(self, entity_id, *args, **kwargs)
+    with patch.object(StateMachine, method, recording_set):
+        yield written
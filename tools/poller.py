@@ -0,0 +1,121 @@
+"""Headless poller of one or many kettles, no Home Assistant needed.
+
+Polls every kettle concurrently with KettleConnection using its own
+Bluetooth scan (bleak) and prints a JSON line with the state and timings
+after every poll: poll wall time and the measured timings of this poll
+only - per command latency percentiles and max, connect and auth times,
+timeouts and retries (--full adds the cumulative ones since start to the
+state). Useful for adapter capacity planning and load tests of the protocol
+stack. Kettles must be paired with the given key, the key is
+written to the kettle on the first connection in pairing mode.
+
+Usage (from the repository root, only bleak and bleak-retry-connector are needed):
+    python -m tools.poller AA:BB:CC:DD:EE:FF[=KEY] [...] [--key 0001020304050607] [--model RK-G211S]
+        [--interval 5] [--count 0] [--adapter hci0] [--non-persistent] [--simulate]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import types
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+# Import the integration modules without its Home Assistant setup code in __init__.py
+COMPONENTS_PATH = Path(__file__).parent.parent / "custom_components"
+for name, path in [("custom_components", COMPONENTS_PATH), ("custom_components.skykettle", COMPONENTS_PATH / "skykettle")]:
+    if name not in sys.modules:
+        module = types.ModuleType(name)
+        module.__path__ = [str(path)]
+        sys.modules[name] = module
+
+from custom_components.skykettle.kettle_connection import COMMAND_NAMES, KettleConnection
+from custom_components.skykettle.kettle_state import KettleState
+
+from .simulator import SimulatedKettle, client_factory as simulated_client_factory
+
+
+def parse_kettle(value, default_key):
+    """MAC[=KEY] argument to (mac, key)."""
+    mac, _, key = value.partition("=")
+    return mac.upper(), list(bytes.fromhex(key or default_key))
+
+
+def state_dict(state):
+    return {name: dict(value) if isinstance(value, types.MappingProxyType) else value
+        for name in KettleState.__slots__ for value in [getattr(state, name)]}
+
+
+async def poll_kettle(args, connection, delay):
+    await asyncio.sleep(delay) # Spread polls of many kettles over the interval
+    n = 0
+    while args.count == 0 or n < args.count:
+        timings_before = connection.timings.copy()
+        start = perf_counter()
+        ok = await connection.update()
+        elapsed = perf_counter() - start
+        timings = connection.timings.since(timings_before)
+        state = connection.state
+        print(json.dumps({
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "mac": connection.mac,
+            "ok": ok,
+            "poll_ms": round(elapsed * 1000, 1),
+            "timings": {
+                "commands": timings.command_summaries(COMMAND_NAMES),
+                "connect": timings.connect.summary(),
+                "auth": timings.auth.summary(),
+                "timeouts": sum(timings.timeouts.values()),
+                "retries": timings.retries,
+            },
+            "state": state_dict(state) if args.full else {
+                "available": state.available,
+                "current_temp": state.current_temp,
+                "target_temp": state.target_temp,
+                "target_mode": state.target_mode_str,
+                "success_rate": state.success_rate,
+            },
+        }, default=str), flush=True)
+        n += 1
+        await asyncio.sleep(max(0, args.interval - elapsed))
+
+
+async def main(args):
+    kettles = [parse_kettle(value, args.key) for value in args.kettles]
+    connections = []
+    for mac, key in kettles:
+        client_factory = None
+        if args.simulate:
+            client_factory = simulated_client_factory(SimulatedKettle(args.model))
+        connections.append(KettleConnection(mac=mac, key=key, persistent=args.persistent, adapter=args.adapter,
+            model=args.model, client_factory=client_factory))
+    try:
+        await asyncio.gather(*[
+            poll_kettle(args, connection, args.interval * n / len(connections))
+            for n, connection in enumerate(connections)
+        ])
+    finally:
+        for connection in connections:
+            await connection.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kettles", nargs="+", metavar="MAC[=KEY]", help="kettle MAC addresses, optionally with own keys (hex)")
+    parser.add_argument("--key", default="0001020304050607", help="default key, 8 bytes in hex")
+    parser.add_argument("--model", default="RK-G211S", help="kettle model")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between polls of every kettle")
+    parser.add_argument("--count", type=int, default=0, help="polls of every kettle, 0 - forever")
+    parser.add_argument("--adapter", help="Bluetooth adapter, e.g. hci0")
+    parser.add_argument("--non-persistent", dest="persistent", action="store_false", help="disconnect after every poll")
+    parser.add_argument("--full", action="store_true", help="print the full state")
+    parser.add_argument("--simulate", action="store_true", help="poll simulated kettles instead of real ones")
+    parser.add_argument("--verbose", action="store_true", help="debug logging")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr)
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,53 @@
+"""Replays a frame capture of a real kettle session through KettleConnection.
+
+The capture is made by the "capture frames" option of the integration
+(skykettle_<mac>.skycap in the config directory). Every frame written by
+KettleConnection is answered with the captured responses, with the original
+delays or as fast as possible, so bugs and timings of a real session can be
+reproduced without the kettle.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.replay skykettle_aabbccddeeff.skycap --model RK-G211S [--fast] [--verbose]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from custom_components.skykettle.capture import ReplaySession, read_capture
+from custom_components.skykettle.kettle_connection import KettleConnection
+
+
+async def main(args):
+    session = ReplaySession(read_capture(args.capture), realtime=not args.fast)
+    connection = KettleConnection(mac="AA:BB:CC:DD:EE:FF", key=list(range(8)), persistent=args.persistent,
+        model=args.model, client_factory=session.client_factory())
+    print(f"{len(session.records)} records")
+    updates = 0
+    while not session.finished:
+        position = session.position
+        ok = await connection.update()
+        updates += 1
+        state = connection.state
+        print(f"{'ok  ' if ok else 'fail'} {session.position:>6}/{len(session.records)} temp={state.current_temp} "
+            f"mode={state.target_mode_str}")
+        if session.position == position: break # Nothing left this connection can use
+    state = connection.state
+    await connection.stop()
+    print(f"updates: {updates}, success rate: {state.success_rate}%, mismatches: {session.mismatches}, skipped: {session.skipped}")
+    print(f"command latency: {dict(state.command_latency)}")
+    print(f"connect time: {dict(state.connect_time)}, auth time: {dict(state.auth_time)}")
+    print(f"timeouts: {state.timeouts}, retries: {state.retries}")
+    return session.mismatches == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="capture file")
+    parser.add_argument("--model", default="RK-G211S", help="kettle model of the capture")
+    parser.add_argument("--fast", action="store_true", help="don't wait for the captured response delays")
+    parser.add_argument("--non-persistent", dest="persistent", action="store_false", help="replay with non-persistent connection")
+    parser.add_argument("--verbose", action="store_true", help="debug logging")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    sys.exit(0 if asyncio.run(main(args)) else 1)
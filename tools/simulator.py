@@ -0,0 +1,339 @@
+"""Simulated SkyKettle and a BLE client stand-in to run KettleConnection without a real kettle.
+
+SimulatedKettle implements the command set of every supported model family
+with simple heating physics. SimulatedClient delivers its responses with
+configurable latency, jitter, latency spikes, slow auth, packet loss and
+disconnects followed by outages. Pass client_factory() result to
+KettleConnection to use them.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.simulator [--model RK-G211S] [--updates 20] [--interval 1] [--time-scale 60]
+        [--latency 0.03] [--jitter 0.01] [--loss 0] [--disconnects 0] [--boil] [--capture FILE]
+"""
+import argparse
+import asyncio
+import random
+from struct import pack, unpack
+from time import monotonic, time
+
+from custom_components.skykettle.const import BOIL_TEMP, ROOM_TEMP
+from custom_components.skykettle.skykettle import SkyKettle
+
+
+class SimulatedKettle():
+    """Kettle state machine, handles raw frames and returns raw responses."""
+    HEAT_RATE = 0.3 # °C per second while heating, about 4 minutes from room temperature to boil
+    COOL_RATE = 0.0005 # Part of the difference with room temperature lost every second
+    POWER_W = 2200
+    HEAT_HYSTERESIS = 2
+    VERSION = (2, 5)
+
+    def __init__(self, model="RK-G211S", clock=monotonic, time_scale=1, pairing=True, push_status=False):
+        self.model = model
+        self.model_code = SkyKettle.get_model_code(model)
+        if not self.model_code: raise ValueError(f"Unknown kettle model: {model}")
+        self.clock = clock
+        self.time_scale = time_scale # Simulated seconds per real second
+        self.pairing = pairing # Accept any key and remember it
+        self.push_status = push_status # Send status when the kettle turns itself off
+        self.key = None
+        self.authorized = False
+        self.notify = None # Callback for unsolicited frames
+        self.unreachable_until = 0 # Connections fail until this clock value
+        self.mode = SkyKettle.MODE_BOIL
+        self.target_temp = 0
+        self.boil_time = 0
+        self.is_on = False
+        self.heating = False
+        self.boiled = False # Keeping temperature after boiling in the boil and heat mode
+        self.temp = float(ROOM_TEMP)
+        self.sound_enabled = True
+        self.color_interval = 30
+        self.lamp_auto_off_hours = 6
+        self.light_switches = {SkyKettle.LIGHT_BOIL: True, SkyKettle.LIGHT_SYNC: False}
+        self.colors = {
+            light_type: SkyKettle.ColorsSet(light_type, 40, 0x5E, 0, 0, 255, 70, 0x5E, 0, 255, 0, 100, 0x5E, 255, 0, 0)
+            for light_type in [SkyKettle.LIGHT_BOIL, SkyKettle.LIGHT_LAMP]
+        }
+        self.fresh_water = True
+        self.schedule = [] # [record id, time, mode, target temp, boil time]
+        self.schedule_max = 10
+        self.ontime = 0.0
+        self.energy_wh = 0.0
+        self.heater_on_count = 0
+        self.user_on_count = 0
+        self.water_time = self.clock()
+        self._last_advance = self.clock()
+
+    def advance(self):
+        """Update the physics up to the current time."""
+        now = self.clock()
+        seconds = (now - self._last_advance) * self.time_scale
+        self._last_advance = now
+        if seconds <= 0: return
+        if self.is_on: self.ontime += seconds
+        if self.is_on and self.mode in [SkyKettle.MODE_BOIL, SkyKettle.MODE_HEAT, SkyKettle.MODE_BOIL_HEAT]:
+            if self.mode == SkyKettle.MODE_HEAT or (self.mode == SkyKettle.MODE_BOIL_HEAT and self.boiled):
+                target = self.target_temp
+            else:
+                target = BOIL_TEMP
+            if not self.heating and self.temp < target - SimulatedKettle.HEAT_HYSTERESIS:
+                self.heating = True
+                self.heater_on_count += 1
+            if self.heating:
+                heat_seconds = min(seconds, (target - self.temp) / SimulatedKettle.HEAT_RATE)
+                self.temp = min(target, self.temp + heat_seconds * SimulatedKettle.HEAT_RATE)
+                self.energy_wh += SimulatedKettle.POWER_W * heat_seconds / 3600
+                if self.temp >= target:
+                    self.heating = False
+                    if self.mode == SkyKettle.MODE_BOIL:
+                        self._turn_off() # Boiled
+                        self._push()
+                    elif self.mode == SkyKettle.MODE_BOIL_HEAT:
+                        self.boiled = True # Keep warm after boiling
+        else:
+            self.heating = False
+        if not self.heating:
+            self.temp = ROOM_TEMP + (self.temp - ROOM_TEMP) * (1 - SimulatedKettle.COOL_RATE) ** seconds
+
+    def _turn_on(self):
+        self.is_on = True
+        self.boiled = False
+        self.user_on_count += 1
+        if self.mode in [SkyKettle.MODE_BOIL, SkyKettle.MODE_BOIL_HEAT]:
+            self.water_time = self.clock()
+
+    def _turn_off(self):
+        self.is_on = False
+        self.heating = False
+
+    def _push(self):
+        if self.push_status and self.notify:
+            self.notify(bytes([0x55, 0, SkyKettle.COMMAND_GET_STATUS]) + self.status() + bytes([0xAA]))
+
+    def status(self):
+        mode = self.mode
+        if self.model_code in [SkyKettle.MODELS_2, SkyKettle.MODELS_3]:
+            # Boil and heat is boil with target temperature for these models
+            if mode == SkyKettle.MODE_BOIL_HEAT: mode = SkyKettle.MODE_BOIL
+            return pack("<BxBxxxxx?xBxxxxx", mode, self.target_temp, self.is_on, round(self.temp))
+        return pack("<BxBx?BB??BxxxBxx", mode, self.target_temp, self.sound_enabled, round(self.temp),
+            min(self.color_interval, 255), False, self.is_on, 0, 0x80 + self.boil_time)
+
+    def handle(self, frame):
+        """Process the frame, returns response frame or None if the kettle doesn't answer."""
+        if len(frame) < 4 or frame[0] != 0x55 or frame[-1] != 0xAA: return None
+        seq, command, params = frame[1], frame[2], bytes(frame[3:-1])
+        self.advance()
+        if command != SkyKettle.COMMAND_AUTH and not self.authorized: return None
+        result = self.execute(command, params)
+        if result == None: return None
+        return bytes([0x55, seq, command]) + result + bytes([0xAA])
+
+    def execute(self, command, params):
+        new_models = self.model_code in [SkyKettle.MODELS_4]
+        if command == SkyKettle.COMMAND_AUTH:
+            if self.pairing and self.key == None: self.key = params
+            self.authorized = params == self.key
+            return bytes([1 if self.authorized else 0])
+        if command == SkyKettle.COMMAND_GET_VERSION:
+            return pack("BB", *SimulatedKettle.VERSION)
+        if command == SkyKettle.COMMAND_GET_STATUS:
+            return self.status()
+        if command == SkyKettle.COMMAND_TURN_ON and self.model_code in [SkyKettle.MODELS_3, SkyKettle.MODELS_4]:
+            self._turn_on()
+            return bytes([1])
+        if command == SkyKettle.COMMAND_TURN_OFF:
+            self._turn_off()
+            return bytes([1])
+        if command == SkyKettle.COMMAND_SET_MAIN_MODE:
+            if new_models:
+                self.mode, self.target_temp, boil_time = unpack("BxBxxxxxxxxxxBxx", params)
+                self.boil_time = boil_time - 0x80
+            else:
+                self.mode, self.target_temp = unpack("BxBx", params)
+                if self.mode == SkyKettle.MODE_BOIL and self.target_temp > 0:
+                    self.mode = SkyKettle.MODE_BOIL_HEAT
+                if self.model_code in [SkyKettle.MODELS_2]: self._turn_on() # There is no turn on command
+            return bytes([1])
+        if not new_models: return None # Other commands are not supported by old models
+        if command == SkyKettle.COMMAND_SYNC_TIME:
+            return bytes([0])
+        if command == SkyKettle.COMMAND_GET_TIME:
+            return pack("<ii", int(time()), 0)
+        if command == SkyKettle.COMMAND_SET_AUTO_OFF_HOURS:
+            self.lamp_auto_off_hours, = unpack("<H", params)
+            return bytes([0])
+        if command == SkyKettle.COMMAND_GET_AUTO_OFF_HOURS:
+            return pack("<H", self.lamp_auto_off_hours)
+        if command == SkyKettle.COMMAND_GET_COLORS:
+            return pack("BBBBBBBBBBBBBBBB", *self.colors[params[0]])
+        if command == SkyKettle.COMMAND_SET_COLORS:
+            colors_set = SkyKettle.ColorsSet(*unpack("BBBBBBBBBBBBBBBB", params))
+            self.colors[colors_set.light_type] = colors_set
+            return bytes([0])
+        if command == SkyKettle.COMMAND_COMMIT_SETTINGS:
+            return bytes([1])
+        if command == SkyKettle.COMMAND_SET_COLOR_INTERVAL:
+            self.color_interval, = unpack("<H", params)
+            return bytes([0])
+        if command == SkyKettle.COMMAND_IMPULSE_COLOR:
+            return bytes([1])
+        if command == SkyKettle.COMMAND_SET_LIGHT_SWITCH:
+            light_type, _, on = unpack("BB?", params)
+            self.light_switches[light_type] = on
+            return bytes([0])
+        if command == SkyKettle.COMMAND_GET_LIGHT_SWITCH:
+            return pack("xx?xx", self.light_switches.get(params[0], False))
+        if command == SkyKettle.COMMAND_SET_SOUND:
+            self.sound_enabled, = unpack("?", params)
+            return bytes([1])
+        if command == SkyKettle.COMMAND_SET_FRESH_WATER:
+            self.fresh_water = bool(params[1])
+            return bytes([1])
+        if command == SkyKettle.COMMAND_GET_FRESH_WATER:
+            hours = int((self.clock() - self.water_time) * self.time_scale / 3600)
+            return pack("<x?HHxxxxxxxxxx", self.fresh_water, 48, hours)
+        if command == SkyKettle.COMMAND_GET_STATS1:
+            return pack("<xxLLLxx", int(self.ontime), int(self.energy_wh), self.heater_on_count)
+        if command == SkyKettle.COMMAND_GET_STATS2:
+            return pack("<xxxLxxxxxxxxx", self.user_on_count)
+        if command == SkyKettle.COMMAND_GET_SCHEDULE_COUNT:
+            return pack("BB", len(self.schedule), self.schedule_max)
+        if command == SkyKettle.COMMAND_GET_SCHEDULE_RECORD:
+            if params[0] >= len(self.schedule): return bytes([0])
+            record_id, start_time, mode, target_temp, boil_time = self.schedule[params[0]]
+            return pack("<BLBBB", record_id, start_time, mode, target_temp, 0x80 + boil_time)
+        if command == SkyKettle.COMMAND_ADD_SCHEDULE_RECORD:
+            if len(self.schedule) >= self.schedule_max: return bytes([0])
+            _, start_time, mode, target_temp, boil_time = unpack("<BLBBB", params)
+            record_id = max([record[0] for record in self.schedule], default=0) + 1
+            self.schedule.append([record_id, start_time, mode, target_temp, boil_time - 0x80])
+            return bytes([1])
+        if command == SkyKettle.COMMAND_DEL_SCHEDULE_RECORD:
+            records = [record for record in self.schedule if record[0] != params[0]]
+            found = len(records) != len(self.schedule)
+            self.schedule = records
+            return bytes([1 if found else 0])
+        return None
+
+
+class SimulatedClient():
+    """BleakClient stand-in connected to a SimulatedKettle."""
+
+    def __init__(self, kettle, disconnected_callback=None, latency=0.03, jitter=0.01, loss=0, disconnects=0, rng=None,
+            spikes=0, spike_latency=2, auth_latency=None, outage=0):
+        self.kettle = kettle
+        self.disconnected_callback = disconnected_callback
+        self.latency = latency # Seconds between the write and the response
+        self.jitter = jitter
+        self.loss = loss # Probability of a lost response
+        self.disconnects = disconnects # Probability of a disconnect on every write
+        self.spikes = spikes # Probability of a response delayed by spike_latency
+        self.spike_latency = spike_latency
+        self.auth_latency = auth_latency # Latency of the auth response, None - same as others
+        self.outage = outage # Seconds the kettle is unreachable after a disconnect
+        self.rng = rng or random.Random()
+        self.is_connected = True
+        self.writes = 0
+        self.commands = [] # Command codes of all writes
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._notify_callback = None
+        kettle.authorized = False
+        kettle.notify = self._schedule
+
+    async def start_notify(self, uuid, callback):
+        self._notify_callback = callback
+
+    async def write_gatt_char(self, uuid, data, response=None):
+        if not self.is_connected: raise IOError("Not connected")
+        self.writes += 1
+        self.bytes_sent += len(data)
+        if len(data) > 2: self.commands.append(data[2])
+        if self.rng.random() < self.disconnects:
+            self.kettle.unreachable_until = self.kettle.clock() + self.outage
+            self._lost()
+            raise IOError("Disconnected")
+        response = self.kettle.handle(bytes(data))
+        if response != None and self.rng.random() >= self.loss:
+            latency = None
+            if len(data) > 2 and data[2] == SkyKettle.COMMAND_AUTH: latency = self.auth_latency
+            if self.rng.random() < self.spikes: latency = self.spike_latency
+            self._schedule(response, latency)
+
+    def _schedule(self, frame, latency=None):
+        if latency == None: latency = self.latency
+        delay = max(0, latency + self.rng.uniform(-self.jitter, self.jitter))
+        asyncio.get_running_loop().call_later(delay, self._deliver, bytearray(frame))
+
+    def _deliver(self, frame):
+        # Responses in flight are lost on disconnect
+        if self.is_connected and self._notify_callback:
+            self.bytes_received += len(frame)
+            self._notify_callback(self, frame)
+
+    def _lost(self):
+        self.is_connected = False
+        if self.kettle.notify == self._schedule: self.kettle.notify = None
+        if self.disconnected_callback:
+            asyncio.get_running_loop().call_soon(self.disconnected_callback, self)
+
+    async def disconnect(self):
+        if self.is_connected: self._lost()
+        return True
+
+
+def client_factory(kettle, clients=None, **kwargs):
+    """KettleConnection client_factory which connects to the simulated kettle, kwargs go to SimulatedClient.
+
+    Every created client is appended to clients list if it's given.
+    """
+    async def connect(disconnected_callback):
+        await asyncio.sleep(kwargs.get("latency", 0.03))
+        if kettle.clock() < kettle.unreachable_until: raise IOError("Kettle is unreachable")
+        # Connected kettle doesn't advertise, so nobody else can connect
+        if kettle.notify != None: raise IOError("Kettle is already connected")
+        client = SimulatedClient(kettle, disconnected_callback, **kwargs)
+        if clients != None: clients.append(client)
+        return client
+    return connect
+
+
+def create_connection(model="RK-G211S", persistent=True, kettle=None, clients=None, capture_file=None, **kwargs):
+    """KettleConnection connected to a new or given simulated kettle."""
+    from custom_components.skykettle.kettle_connection import KettleConnection
+    kettle = kettle or SimulatedKettle(model)
+    return KettleConnection(mac="AA:BB:CC:DD:EE:FF", key=list(range(8)), persistent=persistent,
+        model=kettle.model, client_factory=client_factory(kettle, clients, **kwargs), capture_file=capture_file)
+
+
+async def main(args):
+    kettle = SimulatedKettle(args.model, time_scale=args.time_scale, push_status=True)
+    connection = create_connection(kettle=kettle, latency=args.latency, jitter=args.jitter, loss=args.loss,
+        disconnects=args.disconnects, rng=random.Random(args.seed), capture_file=args.capture)
+    if args.boil:
+        await connection.set_target_mode(SkyKettle.MODE_NAMES[SkyKettle.MODE_BOIL])
+    for _ in range(args.updates):
+        ok = await connection.update()
+        state = connection.state
+        print(f"{'ok  ' if ok else 'fail'} temp={state.current_temp} mode={state.target_mode_str} "
+            f"energy={state.energy_wh} Wh success_rate={state.success_rate}%")
+        await asyncio.sleep(args.interval)
+    await connection.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="RK-G211S", help="kettle model")
+    parser.add_argument("--updates", type=int, default=20, help="number of updates")
+    parser.add_argument("--interval", type=float, default=1, help="seconds between updates")
+    parser.add_argument("--time-scale", type=float, default=60, help="simulated seconds per real second")
+    parser.add_argument("--latency", type=float, default=0.03, help="response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="response latency jitter in seconds")
+    parser.add_argument("--loss", type=float, default=0, help="probability of a lost response")
+    parser.add_argument("--disconnects", type=float, default=0, help="probability of a disconnect on every write")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    parser.add_argument("--boil", action="store_true", help="start boiling")
+    parser.add_argument("--capture", help="capture frames to this file, see tools/replay.py")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,166 @@
+"""Soak test of KettleConnection retry and timeout policies with fault injection.
+
+Drives a connection against the simulated kettle for simulated hours on an
+event loop with a virtual clock, so an hour of polling takes seconds. The
+simulated link loses responses, delays some of them (latency spikes), drops
+the connection with the kettle unreachable for a while and answers auth
+slowly. A target change is made periodically, like a user would do.
+
+Every combination of the given policy values (BLE_RECV_TIMEOUT, MAX_TRIES,
+TRIES_INTERVAL, TARGET_TTL) runs with the same faults seed and reports the
+update success rate, p99 command latency, time to recover after failed
+updates, applied target changes and BLE writes.
+
+Usage (from the repository root, Home Assistant must be installed):
+    python -m tools.soak [--hours 6] [--interval 5] [--loss 0.02] [--spikes 0.01] [--spike-latency 2]
+        [--disconnects 0.002] [--outage 20] [--auth-latency 0.5] [--timeout 1 1.5 3] [--tries 2 3 5]
+        [--tries-interval 0.5] [--target-ttl 30] [--non-persistent] [--seed 1]
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+from statistics import mean
+
+from custom_components.skykettle import kettle_connection
+from custom_components.skykettle.skykettle import SkyKettle
+
+from .simulator import SimulatedKettle, create_connection
+
+# Command line argument: KettleConnection attribute
+POLICY = {
+    "timeout": "BLE_RECV_TIMEOUT",
+    "tries": "MAX_TRIES",
+    "tries_interval": "TRIES_INTERVAL",
+    "target_ttl": "TARGET_TTL",
+}
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop which jumps to the next timer instead of waiting for it."""
+
+    def __init__(self):
+        super().__init__()
+        self._virtual_time = 0.0
+
+    def time(self):
+        return self._virtual_time
+
+    def _run_once(self):
+        if not self._ready:
+            # Cancelled timers (answered timeouts) must not move the clock
+            while self._scheduled and self._scheduled[0]._cancelled:
+                handle = heapq.heappop(self._scheduled)
+                handle._scheduled = False
+                self._timer_cancelled_count -= 1
+            if self._scheduled:
+                self._virtual_time = max(self._virtual_time, self._scheduled[0]._when)
+        super()._run_once()
+
+
+def target_applied(kettle, target_temp):
+    if target_temp == 0: return not kettle.is_on
+    return kettle.is_on and kettle.mode == SkyKettle.MODE_HEAT and kettle.target_temp == target_temp
+
+
+async def soak(args, policy):
+    loop = asyncio.get_running_loop()
+    # KettleConnection measures TTLs and latencies with monotonic()
+    kettle_connection.monotonic = loop.time
+    clients = []
+    kettle = SimulatedKettle(args.model, clock=loop.time)
+    connection = create_connection(kettle=kettle, persistent=args.persistent, clients=clients,
+        latency=args.latency, jitter=args.jitter, loss=args.loss, spikes=args.spikes, spike_latency=args.spike_latency,
+        disconnects=args.disconnects, outage=args.outage, auth_latency=args.auth_latency, rng=random.Random(args.seed))
+    for name, value in policy.items():
+        setattr(connection, POLICY[name], value)
+    start = loop.time()
+    end = start + args.hours * 3600
+    updates = ok_updates = 0
+    failed_since = None
+    recover_times = []
+    next_action = start + args.action_interval
+    targets = itertools.cycle([70, 0])
+    pending_target = None # (temp, time)
+    actions = applied = 0
+    apply_times = []
+    while loop.time() < end:
+        now = loop.time()
+        if now >= next_action:
+            target_temp = next(targets)
+            pending_target = (target_temp, now)
+            actions += 1
+            next_action = now + args.action_interval
+            await connection.set_target_temp(target_temp, SkyKettle.MODE_NAMES[SkyKettle.MODE_HEAT])
+        else:
+            updates += 1
+            if await connection.update():
+                ok_updates += 1
+                if failed_since != None:
+                    recover_times.append(loop.time() - failed_since)
+                    failed_since = None
+            elif failed_since == None:
+                failed_since = now
+        if pending_target and target_applied(kettle, pending_target[0]):
+            applied += 1
+            apply_times.append(loop.time() - pending_target[1])
+            pending_target = None
+        await asyncio.sleep(args.interval)
+    state = connection.state
+    await connection.stop()
+    return {
+        "success_rate": 100 * ok_updates / max(updates, 1),
+        "p99_ms": state.command_latency.get("p99", None),
+        "timeouts": state.timeouts,
+        "retries": state.retries,
+        "failures": len(recover_times) + (1 if failed_since != None else 0),
+        "recover_mean_s": mean(recover_times) if recover_times else 0,
+        "recover_max_s": max(recover_times, default=0),
+        "applied": f"{applied}/{actions}",
+        "apply_mean_s": mean(apply_times) if apply_times else 0,
+        "writes": sum(client.writes for client in clients),
+    }
+
+
+async def main(args):
+    names = list(POLICY)
+    for values in itertools.product(*[getattr(args, name) for name in names]):
+        policy = dict(zip(names, values))
+        result = await soak(args, policy)
+        print(" ".join(f"{name}={value:<4}" for name, value in policy.items())
+            + f" | success {result['success_rate']:6.2f}%  p99 {result['p99_ms']} ms"
+            + f"  timeouts {result['timeouts']:>5}  retries {result['retries']:>5}"
+            + f"  failures {result['failures']:>4}  recover mean/max {result['recover_mean_s']:6.1f}/{result['recover_max_s']:6.1f} s"
+            + f"  applied {result['applied']} in {result['apply_mean_s']:5.1f} s  writes {result['writes']}", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="RK-G211S", help="kettle model")
+    parser.add_argument("--hours", type=float, default=6, help="simulated hours of every run")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between polls")
+    parser.add_argument("--action-interval", type=float, default=600, help="seconds between target changes")
+    parser.add_argument("--non-persistent", dest="persistent", action="store_false", help="non-persistent connection")
+    parser.add_argument("--latency", type=float, default=0.03, help="response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="response latency jitter in seconds")
+    parser.add_argument("--loss", type=float, default=0.02, help="probability of a lost response")
+    parser.add_argument("--spikes", type=float, default=0.01, help="probability of a latency spike")
+    parser.add_argument("--spike-latency", type=float, default=2, help="latency of a spike in seconds")
+    parser.add_argument("--disconnects", type=float, default=0.002, help="probability of a disconnect on every write")
+    parser.add_argument("--outage", type=float, default=20, help="seconds the kettle is unreachable after a disconnect")
+    parser.add_argument("--auth-latency", type=float, default=0.5, help="auth response latency in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="faults random seed, same for every policy")
+    parser.add_argument("--timeout", type=float, nargs="+", default=[1, 1.5, 3], help="BLE_RECV_TIMEOUT values")
+    parser.add_argument("--tries", type=int, nargs="+", default=[2, 3, 5], help="MAX_TRIES values")
+    parser.add_argument("--tries-interval", type=float, nargs="+", default=[0.5], help="TRIES_INTERVAL values")
+    parser.add_argument("--target-ttl", type=float, nargs="+", default=[30], help="TARGET_TTL values")
+    parser.add_argument("--verbose", action="store_true", help="show connection warnings")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.ERROR)
+    loop = VirtualClockLoop()
+    try:
+        loop.run_until_complete(main(args))
+    finally:
+        loop.close()